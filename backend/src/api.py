@@ -3,16 +3,22 @@
 # --------------------------------------------------------------------------"""
 
 
+# Standard library dependencies
+import codecs
+
 # Third party dependencies
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 
 # Local application dependencies
-from config.config import setup_db, STATUS_ERR
+from config.config import setup_db, EXPORT, LOCAL_AUTH, STATUS_ERR
 from controllers.controllers import (Courses, Students, Instructors,
-                                     Assignments, Enrollments)
-from helpers.helpers import StatusError, get_detail
+                                     Assignments, Enrollments, Grades,
+                                     Exports)
+from helpers.helpers import (FastJSONProvider, StatusError, get_detail,
+                             get_import_format)
 from auth.auth import requires_auth
+from auth.local_issuer import load_key
 
 
 """ --------------------------------------------------------------------------#
@@ -25,6 +31,16 @@ def create_app():
     app = Flask(__name__)
     setup_db(app)
 
+    # Create the local issuer's key set before any token is verified, so
+    # the first request doesn't find it missing.
+    if LOCAL_AUTH.ENABLED:
+        load_key()
+
+    # Serialize jsonify responses with the fast encoder, where Flask
+    # supports JSON providers.
+    if FastJSONProvider:
+        app.json = FastJSONProvider(app)
+
     # Set up CORS. Allow '*' for origins.
     CORS(app, resources={r"*": {"origins": "*"}})
 
@@ -60,10 +76,12 @@ def create_app():
                 # Get detail arguments.
                 detail = get_detail()
                 page = request.args.get('page')
+                cursor = request.args.get('cursor')
                 # Create Students object.
                 this_student_list = Students()
                 # Get a list of students with detail.
-                this_student_list.list_students(detail=detail, page=page)
+                this_student_list.list_students(detail=detail, page=page,
+                                                cursor=cursor)
                 # Return JSON response
                 return this_student_list.response
             return get_students()
@@ -82,6 +100,20 @@ def create_app():
                 return this_student.response
             return post_student()
 
+    """ Import students from CSV or NDJSON. """
+    @app.route('/students/import', methods=['POST'])
+    @requires_auth('post:student')
+    def import_students(payload):
+        # Get the import format, and stream the request body as lines.
+        file_format = get_import_format()
+        lines = codecs.iterdecode(request.stream, 'utf-8', errors='replace')
+        # Create Students object.
+        this_student_list = Students()
+        # Import the students.
+        this_student_list.import_students(lines, file_format)
+        # Return JSON response.
+        return this_student_list.response
+
     """ View, edit or delete student by id. """
     @app.route('/students/<uid>', methods=['GET', 'PATCH', 'DELETE'])
     def view_or_manage_student(uid):
@@ -120,9 +152,27 @@ def create_app():
         return this_student.response
 
     """ Get grades for a student. """
+    @app.route('/students/<uid>/grades', methods=['GET'])
     @app.route('/student/<uid>/grades', methods=['GET'])
-    def get_student_grades(uid):
-        return "Hello world!"
+    @requires_auth('get:student-grades')
+    def get_student_grades(payload, uid):
+        # Create Grades object.
+        this_grade_list = Grades(uid=uid)
+        # Get the student's grades.
+        this_grade_list.get_student_grades()
+        # Return JSON response.
+        return this_grade_list.response
+
+    """ Get a student's transcript and grade point average. """
+    @app.route('/students/<uid>/transcript', methods=['GET'])
+    @requires_auth('get:student-grades')
+    def get_student_transcript(payload, uid):
+        # Create Grades object.
+        this_transcript = Grades(uid=uid)
+        # Get the student's transcript.
+        this_transcript.get_transcript()
+        # Return JSON response.
+        return this_transcript.response
 
     # Instructor routes
     # -------------------------------------------------------------------------
@@ -136,10 +186,13 @@ def create_app():
                 # Get detail arguments.
                 detail = get_detail()
                 page = request.args.get('page')
+                cursor = request.args.get('cursor')
                 # Create Instructors object.
                 this_instructor_list = Instructors()
                 # Get a list of instructors with detail.
-                this_instructor_list.list_instructors(detail=detail, page=page)
+                this_instructor_list.list_instructors(detail=detail,
+                                                      page=page,
+                                                      cursor=cursor)
                 # Return JSON response
                 return this_instructor_list.response
             return get_instructors()
@@ -157,6 +210,20 @@ def create_app():
                 return this_instructor.response
             return post_instructor()
 
+    """ Import instructors from CSV or NDJSON. """
+    @app.route('/instructors/import', methods=['POST'])
+    @requires_auth('post:instructor')
+    def import_instructors(payload):
+        # Get the import format, and stream the request body as lines.
+        file_format = get_import_format()
+        lines = codecs.iterdecode(request.stream, 'utf-8', errors='replace')
+        # Create Instructors object.
+        this_instructor_list = Instructors()
+        # Import the instructors.
+        this_instructor_list.import_instructors(lines, file_format)
+        # Return JSON response.
+        return this_instructor_list.response
+
     """ View, edit or delete instructor by id. """
     @app.route('/instructors/<uid>', methods=['GET', 'PATCH', 'DELETE'])
     def view_or_manage_instructor(uid):
@@ -204,10 +271,14 @@ def create_app():
             # Get detail arguments.
             detail = get_detail()
             page = request.args.get('page')
+            cursor = request.args.get('cursor')
             # Create Courses object.
             this_course_list = Courses()
             # Get a list of courses with detail.
-            this_course_list.list_courses(detail=detail, page=page)
+            this_course_list.list_courses(
+                detail=detail, page=page, cursor=cursor,
+                if_none_match=request.if_none_match
+            )
             # Return JSON response
             return this_course_list.response
         # Respond to POST request.
@@ -233,7 +304,7 @@ def create_app():
         this_course = Courses(request_data=this_request, uid=uid)
         # Get, patch or delete course and return JSON response.
         if request.method == 'GET':
-            this_course.get_course()
+            this_course.get_course(if_none_match=request.if_none_match)
         elif request.method == 'PATCH':
             @requires_auth('patch:course')
             def patch_course(jwt):
@@ -271,8 +342,14 @@ def create_app():
 
     """ Get grades for a course. """
     @app.route('/courses/<uid>/grades', methods=['GET'])
-    def get_course_grades(uid):
-        return "Hello world!"
+    @requires_auth('get:course-grades')
+    def get_course_grades(payload, uid):
+        # Create Grades object.
+        this_grade_list = Grades(uid=uid)
+        # Get the course's grades and their distribution.
+        this_grade_list.get_course_grades()
+        # Return JSON response.
+        return this_grade_list.response
 
     # Assignment routes
     # -------------------------------------------------------------------------
@@ -315,6 +392,19 @@ def create_app():
         # Return JSON response.
         return this_enrollment.response
 
+    """ Create enrollments in bulk. """
+    @app.route('/enrollments/bulk', methods=['POST'])
+    @requires_auth('post:enrollment')
+    def enroll_courses_bulk(payload):
+        # Get response data.
+        this_request = request.get_json()
+        # Pass response data to controller.
+        this_enrollment = Enrollments(request_data=this_request)
+        # Create new enrollments.
+        this_enrollment.create_enrollments_bulk()
+        # Return JSON response.
+        return this_enrollment.response
+
     """ Delete an enrollment. """
     @app.route('/enrollments/<uid>', methods=['DELETE'])
     @requires_auth('delete:enrollment')
@@ -326,17 +416,85 @@ def create_app():
         # Return JSON response.
         return this_enrollment.response
 
+    """ Remove a student from a course waitlist. """
+    @app.route('/waitlist/<uid>', methods=['DELETE'])
+    @requires_auth('delete:enrollment')
+    def delete_waitlist(payload, uid):
+        # Pass the waitlist id to controller.
+        this_enrollment = Enrollments(uid=uid)
+        # Delete the waitlist entry.
+        this_enrollment.delete_waitlist()
+        # Return JSON response.
+        return this_enrollment.response
+
+    # Export routes
+    # -------------------------------------------------------------------------
+    """ Export students, instructors, courses or rosters. """
+    @app.route('/export/<entity>', methods=['GET'])
+    def export_records(entity):
+        # Create Exports object, with ndjson as the default format.
+        this_export = Exports(entity=entity,
+                              file_format=request.args.get('format', 'ndjson'))
+        # Stream the export, authorizing it if the entity needs permission.
+        permission = EXPORT.PERMISSIONS[entity]
+        if permission:
+            @requires_auth(permission)
+            def export_authorized(jwt):
+                this_export.export_records()
+            export_authorized()
+        else:
+            this_export.export_records()
+        # Return streaming response.
+        return this_export.response
+
     # Grade routes
     # --------------------------------------------------------------------------
-    """ Create a grade. """
+    """ Post a course's grades. """
     @app.route('/grades', methods=['POST'])
-    def create_grades():
-        return "Hello world!"
+    @requires_auth('post:grades')
+    def create_grades(payload):
+        # Get response data.
+        this_request = request.get_json()
+        # Pass response data to controller.
+        this_grade = Grades(request_data=this_request)
+        # Create or update the grades.
+        this_grade.post_grades()
+        # Return JSON response.
+        return this_grade.response
 
     """ Edit or Delete a grade. """
     @app.route('/grades/<uid>', methods=['PATCH', 'DELETE'])
     def edit_delete_grades(uid):
-        return "Hellow World!"
+        # Get response data.
+        this_request = request.get_json()
+        # Pass response data and grade id to controller.
+        this_grade = Grades(request_data=this_request, uid=uid)
+        # Patch or delete grade and return JSON response.
+        if request.method == 'PATCH':
+            @requires_auth('patch:grade')
+            def patch_grade(jwt):
+                this_grade.edit_grade()
+            patch_grade()
+        elif request.method == "DELETE":
+            @requires_auth('delete:grade')
+            def delete_grade(jwt):
+                this_grade.delete_grade()
+            delete_grade()
+        # Return JSON response.
+        return this_grade.response
+
+    # Cache routes
+    # --------------------------------------------------------------------------
+    """ View the course list cache's hit and miss counts. """
+    @app.route('/cache/stats', methods=['GET'])
+    @requires_auth('get:cache-stats')
+    def get_cache_stats(payload):
+        # Create Courses object.
+        this_course_list = Courses()
+        # Get the cache's counts.
+        this_course_list.get_cache_stats()
+        # Return JSON response.
+        return this_course_list.response
 
     """ ----------------------------------------------------------------------#
     # ERROR_HANDLING
@@ -345,12 +503,15 @@ def create_app():
     # Handles errors passed by the StatusError function.
     @app.errorhandler(StatusError)
     def status_error(error):
-        return jsonify({
+        response = {
             'success': False,
             'error': error.status_code,
             'message': error.message,
             'description': error.description
-        }), error.status_code
+        }
+        if error.errors is not None:
+            response['errors'] = error.errors
+        return jsonify(response), error.status_code
 
     # Handles unspecified 400 errors.
     @app.errorhandler(400)
@@ -3,7 +3,11 @@
 # --------------------------------------------------------------------------"""
 
 
+import hashlib
 import json
+import threading
+import time
+from collections import OrderedDict
 from flask import request, _request_ctx_stack
 from functools import wraps
 from jose import jwt
@@ -60,24 +64,170 @@ def check_permissions(permission, payload):
     return True
 
 
-# Verifies authorization token, and returns payload
-def verify_decode_jwt(token):
-    # Get the public key from Auth0.com
-    jsonurl = urlopen('https://'+AUTH0.DOMAIN+'/.well-known/jwks.json')
-    jwks = json.loads(jsonurl.read())
-    # Get the token from the header.
-    unverified_header = jwt.get_unverified_header(token)
-    rsa_key = {}
-    # Converts public keys to dict.
-    for key in jwks['keys']:
-        if key['kid'] == unverified_header['kid']:
-            rsa_key = {
+""" --------------------------------------------------------------------------#
+# JSON WEB KEY SET CACHE
+# --------------------------------------------------------------------------"""
+
+
+# Caches the public keys published by Auth0 by kid, so tokens are verified
+# without fetching the key set on every request. Stale keys are served while
+# the key set is revalidated in the background, an unknown kid triggers one
+# blocking refresh, and a failed fetch keeps the last good key set.
+class JWKSCache:
+    def __init__(self, url=None, ttl=None, min_refresh=None, timeout=None):
+        self.url = url or AUTH0.JWKS_URL
+        self.ttl = AUTH0.JWKS_TTL if ttl is None else ttl
+        self.min_refresh = (AUTH0.JWKS_MIN_REFRESH if min_refresh is None
+                            else min_refresh)
+        self.timeout = AUTH0.JWKS_TIMEOUT if timeout is None else timeout
+        self.keys = {}
+        self.fetched_at = None
+        self.attempted_at = None
+        self.lock = threading.Lock()
+
+    # Returns the key matching kid, or None if there isn't one.
+    def get_key(self, kid):
+        key = self.keys.get(kid)
+        # Unknown kid: the keys may have rotated, refresh and wait.
+        if key is None:
+            self.refresh()
+            key = self.keys.get(kid)
+        # Stale key: serve it and revalidate in the background.
+        elif not self.is_fresh() and not self.recently_attempted():
+            self.refresh_in_background()
+        return key
+
+    # Checks whether the key set was fetched within the TTL.
+    def is_fresh(self):
+        return (self.fetched_at is not None and
+                time.monotonic() - self.fetched_at < self.ttl)
+
+    # Checks whether a fetch was attempted too recently to try again, so
+    # bursts of unknown kids or an Auth0 outage cause a single fetch.
+    def recently_attempted(self):
+        return (self.attempted_at is not None and
+                time.monotonic() - self.attempted_at < self.min_refresh)
+
+    # Refreshes the key set, waiting for a refresh already in flight.
+    def refresh(self):
+        with self.lock:
+            self.refresh_keys()
+
+    # Refreshes the key set in a daemon thread, unless a refresh is
+    # already in flight.
+    def refresh_in_background(self):
+        if self.lock.acquire(blocking=False):
+            def refresh_and_release():
+                try:
+                    self.refresh_keys()
+                finally:
+                    self.lock.release()
+            threading.Thread(target=refresh_and_release, daemon=True).start()
+
+    # Fetches the key set, keeping the current keys if the fetch fails.
+    # Must be called holding the lock.
+    def refresh_keys(self):
+        if self.recently_attempted():
+            return
+        self.attempted_at = time.monotonic()
+        try:
+            keys = self.fetch()
+        except (OSError, ValueError, KeyError):
+            return
+        self.keys = keys
+        self.fetched_at = time.monotonic()
+
+    # Gets the key set and converts public keys to dicts keyed by kid.
+    def fetch(self):
+        with urlopen(self.url, timeout=self.timeout) as response:
+            jwks = json.loads(response.read())
+        return {
+            key['kid']: {
                 'kty': key['kty'],
                 'kid': key['kid'],
                 'use': key['use'],
                 'n': key['n'],
                 'e': key['e']
-            }
+            } for key in jwks['keys']
+        }
+
+
+# Process-wide key set cache used to verify tokens.
+jwks_cache = JWKSCache()
+
+
+""" --------------------------------------------------------------------------#
+# VERIFIED TOKEN CACHE
+# --------------------------------------------------------------------------"""
+
+
+# Caches verified token payloads in a bounded LRU keyed by a hash of the
+# token, so a token reused across requests skips signature verification.
+# Entries expire at the token's exp claim.
+class TokenCache:
+    def __init__(self, max_size=None):
+        self.max_size = (AUTH0.TOKEN_CACHE_SIZE if max_size is None
+                         else max_size)
+        self.payloads = OrderedDict()
+        self.lock = threading.Lock()
+
+    # Hashes the token, so raw tokens are not kept in memory.
+    def key(self, token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    # Returns the cached payload for the token, or None if the token
+    # isn't cached or has expired.
+    def get(self, token):
+        key = self.key(token)
+        with self.lock:
+            entry = self.payloads.get(key)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if time.time() >= expires_at:
+                del self.payloads[key]
+                return None
+            self.payloads.move_to_end(key)
+            return payload
+
+    # Caches a verified payload, evicting the least recently used
+    # payloads when the cache is full. Tokens without exp aren't cached.
+    def set(self, token, payload):
+        expires_at = payload.get('exp')
+        if self.max_size < 1 or not isinstance(expires_at, (int, float)):
+            return
+        key = self.key(token)
+        with self.lock:
+            self.payloads[key] = (payload, expires_at)
+            self.payloads.move_to_end(key)
+            while len(self.payloads) > self.max_size:
+                self.payloads.popitem(last=False)
+
+
+# Process-wide cache of verified token payloads.
+token_cache = TokenCache()
+
+
+""" --------------------------------------------------------------------------#
+# TOKEN VERIFICATION
+# --------------------------------------------------------------------------"""
+
+
+# Verifies authorization token, and returns payload
+def verify_decode_jwt(token):
+    # Return the payload of a token that has already been verified.
+    payload = token_cache.get(token)
+    if payload is not None:
+        _request_ctx_stack.top.current_user = payload
+        return payload
+    # Get the token header.
+    try:
+        unverified_header = jwt.get_unverified_header(token)
+    except Exception:
+        raise StatusError(STATUS_ERR.CODE_400,
+                          STATUS_ERR.PARSE_TOKEN, 400)
+    # Get the matching public key from the cached key set.
+    rsa_key = jwks_cache.get_key(unverified_header.get('kid'))
     # Verify the token
     if rsa_key:
         try:
@@ -97,6 +247,7 @@ def verify_decode_jwt(token):
         except Exception:
             raise StatusError(STATUS_ERR.CODE_400,
                               STATUS_ERR.PARSE_TOKEN, 400)
+        token_cache.set(token, payload)
         _request_ctx_stack.top.current_user = payload
         return payload
 
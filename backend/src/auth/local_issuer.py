@@ -0,0 +1,114 @@
+""" --------------------------------------------------------------------------#
+# IMPORTS
+# --------------------------------------------------------------------------"""
+
+
+import base64
+import json
+import os
+import tempfile
+import time
+from Crypto.PublicKey import RSA
+from jose import jwt
+from config.config import AUTH0, LOCAL_AUTH
+
+
+""" --------------------------------------------------------------------------#
+# LOCAL TOKEN ISSUER
+# --------------------------------------------------------------------------"""
+
+
+# Stands in for Auth0 when LOCAL_AUTH is enabled: mints RS256 tokens for
+# the test users with their roles' permissions, and publishes the public
+# key in a key set file that AUTH0.JWKS_URL points at. Tokens carry
+# Auth0's issuer and audience, so they're verified exactly as Auth0's
+# are.
+
+
+# Encodes an integer as unpadded base64url, as JSON web keys expect.
+def encode_int(value):
+    data = value.to_bytes((value.bit_length() + 7) // 8, 'big')
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+# Raises PermissionError unless the current user owns the path and other
+# users can't write to it, so no one else can plant or swap the key.
+def check_owner(path):
+    if not hasattr(os, 'getuid'):
+        return
+    status = os.stat(path)
+    if status.st_uid != os.getuid():
+        raise PermissionError(f'{path} is not owned by the current user')
+    if status.st_mode & 0o022:
+        raise PermissionError(f'{path} is writable by other users')
+
+
+# Writes data to path atomically. Unless replace is set, an existing file
+# is kept, so processes racing to create a key all use the first one.
+# Files are only readable by the current user.
+def write_file(path, data, replace=True):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as temp_file:
+            temp_file.write(data)
+        if replace:
+            os.replace(temp_path, path)
+        else:
+            try:
+                os.link(temp_path, path)
+            except FileExistsError:
+                pass
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+# Returns the issuer's private key, generating it and writing its key set
+# the first time. The key dir is created for the current user only, and a
+# key or key dir another user owns or can write to is refused.
+def load_key():
+    directory = os.path.dirname(LOCAL_AUTH.KEY_PATH)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    check_owner(directory)
+    if not os.path.exists(LOCAL_AUTH.KEY_PATH):
+        key = RSA.generate(2048)
+        write_file(LOCAL_AUTH.KEY_PATH, key.export_key('PEM'),
+                   replace=False)
+    check_owner(LOCAL_AUTH.KEY_PATH)
+    with open(LOCAL_AUTH.KEY_PATH, 'rb') as key_file:
+        key = RSA.import_key(key_file.read())
+    if not os.path.exists(LOCAL_AUTH.JWKS_PATH):
+        write_jwks(key)
+    return key
+
+
+# Writes the key set with the key's public key.
+def write_jwks(key):
+    jwks = {'keys': [{
+        'kty': 'RSA',
+        'kid': LOCAL_AUTH.KID,
+        'use': 'sig',
+        'alg': 'RS256',
+        'n': encode_int(key.n),
+        'e': encode_int(key.e)
+    }]}
+    write_file(LOCAL_AUTH.JWKS_PATH, json.dumps(jwks).encode())
+
+
+# Mints a token for a test user with their role's permissions, or the
+# provided ones. A negative TTL mints an expired token.
+def mint_token(test_user, permissions=None, ttl=None):
+    now = int(time.time())
+    claims = {
+        'iss': f'https://{AUTH0.DOMAIN}/',
+        'sub': f'local|{test_user.NAME}',
+        'aud': AUTH0.API_AUDIENCE,
+        'iat': now,
+        'exp': now + (LOCAL_AUTH.TOKEN_TTL if ttl is None else ttl),
+        'permissions': (test_user.PERMISSIONS if permissions is None
+                        else permissions)
+    }
+    return jwt.encode(claims, load_key().export_key('PEM').decode(),
+                      algorithm='RS256', headers={'kid': LOCAL_AUTH.KID})
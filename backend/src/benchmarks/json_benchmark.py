@@ -0,0 +1,94 @@
+""" --------------------------------------------------------------------------#
+# IMPORTS
+# --------------------------------------------------------------------------"""
+
+
+# Standard library dependencies
+import argparse
+import timeit
+from unittest import mock
+
+# Third party dependencies
+from flask import Flask, jsonify
+
+# Local application dependencies
+from helpers import helpers
+from helpers.helpers import json_dumps
+
+
+""" --------------------------------------------------------------------------#
+# JSON BENCHMARK
+# --------------------------------------------------------------------------"""
+
+
+# Compares response serialization before and after the fast encoder, for
+# course lists of increasing size. Times are the best of the repeats, in
+# milliseconds. Run from src with: python -m benchmarks.json_benchmark
+
+
+# Returns response data with count courses, shaped like Course.full().
+def course_list(count):
+    return {
+        'success': True,
+        'total_records': count,
+        'courses': [{
+            'uid': uid,
+            'title': f'Underwater Basket Weaving {uid}',
+            'instructors': [
+                {'uid': uid, 'name': 'Charles Francis Xavier'},
+                {'uid': uid + 1, 'name': 'Ned Brainard'}
+            ],
+            'days': ['Monday', 'Wednesday', 'Friday'],
+            'start time': '07:30',
+            'end time': '09:00',
+            'description': 'This course is probably totally useless.',
+            'capacity': 30,
+            'seats taken': uid % 30,
+            'credits': 3
+        } for uid in range(1, count + 1)]
+    }
+
+
+# Returns the best time of the serializer over the repeats, in ms.
+def best_time(serialize, number, repeat):
+    times = timeit.repeat(serialize, number=number, repeat=repeat)
+    return min(times) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Time response serialization by response size.'
+    )
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10, 100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    app = Flask(__name__)
+    # Serializers with the patch each runs under. jsonify is the encoder
+    # before, and json_dumps without orjson is the fallback after.
+    serializers = [
+        ('jsonify', lambda data: jsonify(data).get_data(),
+         mock.patch.object(helpers, 'orjson', helpers.orjson)),
+        ('stdlib', json_dumps, mock.patch.object(helpers, 'orjson', None)),
+    ]
+    if helpers.orjson:
+        serializers.append(('orjson', json_dumps,
+                            mock.patch.object(helpers, 'orjson',
+                                              helpers.orjson)))
+    print(f"{'courses':>8} {'bytes':>10} " +
+          ' '.join(f'{name + " ms":>12}' for name, *_ in serializers))
+    with app.app_context():
+        for size in args.sizes:
+            data = course_list(size)
+            number = max(1, 10000 // size)
+            times = []
+            for _, serialize, patch in serializers:
+                with patch:
+                    times.append(best_time(lambda: serialize(data), number,
+                                           args.repeat))
+            print(f'{size:>8} {len(json_dumps(data)):>10} ' +
+                  ' '.join(f'{time:>12.3f}' for time in times))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+""" --------------------------------------------------------------------------#
+# IMPORTS
+# --------------------------------------------------------------------------"""
+
+
+# Standard library dependencies
+import argparse
+import json
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Third party dependencies
+import requests
+from sqlalchemy import event
+from werkzeug.serving import make_server
+
+# Local application dependencies
+from api import create_app
+from cache.cache import catalog_cache
+from config.config import (db, create_database, setup_db, test_database_path,
+                           PAGE_LENGTH, TEST_USERS)
+from database.test_data.generated_data import GeneratedData
+from helpers.helpers import get_user_token_headers
+
+
+""" --------------------------------------------------------------------------#
+# LOAD BENCHMARK
+# --------------------------------------------------------------------------"""
+
+
+# Drives the API's routes with concurrent clients against a seeded database,
+# and reports latency percentiles, throughput and queries per request for
+# each route as JSON, so runs can be compared across commits. The app is
+# served on a local threaded server in this process, so its queries can be
+# counted. Tokens are minted by the local issuer, so set LOCAL_AUTH=1. Run
+# from src with: python -m benchmarks.load_benchmark --students 100000
+#
+# The benchmark drops and seeds the test database (test_database_path)
+# unless --database names another one, or --no-seed reuses its data. The
+# enrollment route expects the seeded students, so reused data must have
+# been seeded with the same scale, warmup and requests.
+
+
+""" SEEDING
+# --------------------------------------------------------------------------"""
+
+
+# Drops and seeds the database with generated records. The last unenrolled
+# students are left without enrollments, for the enrollment route.
+def seed_database(students, instructors, courses, enrollments=4,
+                  unenrolled=0, seed=0):
+    db.drop_all()
+    db.create_all()
+    catalog_cache.clear()
+    GeneratedData(students=students, instructors=instructors,
+                  courses=courses, enrollments=enrollments,
+                  unenrolled=unenrolled, seed=seed).create_records()
+
+
+""" ROUTES
+# --------------------------------------------------------------------------"""
+
+
+# Returns each route's request for the number, as (method, path, body,
+# user). Uids are drawn from the seeded ranges, and enrollments enroll
+# the unenrolled students in turn.
+def route_requests(scale, random_uid):
+    students, instructors, courses, unenrolled = scale
+    course_pages = max(courses // PAGE_LENGTH.COURSES, 1)
+    student_pages = max(students // PAGE_LENGTH.STUDENTS, 1)
+    return {
+        'list_courses': lambda number: (
+            'GET', f'/courses?page={number % course_pages + 1}', None, None
+        ),
+        'course_detail': lambda number: (
+            'GET', f'/courses/{random_uid(courses)}', None, None
+        ),
+        'course_roster': lambda number: (
+            'GET', f'/courses/{random_uid(courses)}/students', None,
+            'REGISTRAR'
+        ),
+        'list_students': lambda number: (
+            'GET', f'/students?page={number % student_pages + 1}', None,
+            'REGISTRAR'
+        ),
+        'student_courses': lambda number: (
+            'GET', f'/students/{random_uid(students)}/courses', None,
+            'REGISTRAR'
+        ),
+        'create_enrollment': lambda number: (
+            'POST', '/enrollments', {
+                'student_uid': students - unenrolled + number + 1,
+                'course_uid': random_uid(courses)
+            }, 'REGISTRAR'
+        ),
+        'edit_course': lambda number: (
+            'PATCH', f'/courses/{random_uid(courses)}',
+            {'description': f'Edited by load benchmark request {number}.'},
+            'INSTRUCTOR'
+        )
+    }
+
+
+""" MEASUREMENT
+# --------------------------------------------------------------------------"""
+
+
+# Counts the statements executed on the engine, across server threads.
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self.increment)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, 'before_cursor_execute', self.increment)
+
+    def increment(self, *args):
+        with self.lock:
+            self.count += 1
+
+
+# Returns the nearest rank percentile of sorted values.
+def percentile(values, percent):
+    if not values:
+        return None
+    rank = max(int(round(percent / 100 * len(values))), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+# Sends the route's requests from concurrent clients, and returns its
+# latency percentiles in ms, throughput and queries per request. Requests
+# are built before they're sent, so runs with the same random seed send
+# the same requests. Warmup requests are sent first, one at a time, and
+# not measured.
+def run_route(base_url, build, headers, args, counter):
+    clients = threading.local()
+    route = [build(number) for number in range(args.warmup + args.requests)]
+
+    def send(request):
+        method, path, body, user = request
+        if not hasattr(clients, 'session'):
+            clients.session = requests.Session()
+        start = time.perf_counter()
+        response = clients.session.request(
+            method, base_url + path, json=body,
+            headers=headers[user] if user else None
+        )
+        return time.perf_counter() - start, response.status_code
+
+    for request in route[:args.warmup]:
+        send(request)
+    queries = counter.count
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(send, route[args.warmup:]))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, status in results if status >= 400),
+        'statuses': statuses,
+        'throughput_rps': round(len(results) / elapsed, 2),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'max': round(latencies[-1], 3)
+        },
+        'queries_per_request': round((counter.count - queries) /
+                                     len(results), 2)
+    }
+
+
+# Returns the checked out commit, so results can be compared across
+# commits, or None outside a git checkout.
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    # Route names, from builders that are never called.
+    routes = list(route_requests((0, 0, 0, 0), None))
+    parser = argparse.ArgumentParser(
+        description='Load test the API routes and report JSON results.'
+    )
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--instructors', type=int, default=50)
+    parser.add_argument('--courses', type=int, default=100)
+    parser.add_argument('--enrollments', type=int, default=4,
+                        help='most courses a seeded student takes')
+    parser.add_argument('--routes', nargs='+', choices=routes,
+                        default=routes)
+    parser.add_argument('--requests', type=int, default=500,
+                        help='measured requests per route')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--database', default=test_database_path)
+    parser.add_argument('--no-seed', dest='seed', action='store_false',
+                        help='reuse the data already in the database')
+    parser.add_argument('--random-seed', type=int, default=0)
+    parser.add_argument('--output', help='write results to this file')
+    args = parser.parse_args()
+
+    create_database(args.database)
+    app = create_app()
+    setup_db(app, args.database)
+    # Enough students are left unenrolled for every enrollment request.
+    unenrolled = args.warmup + args.requests
+    with app.app_context():
+        if args.seed:
+            seed_database(args.students, args.instructors, args.courses,
+                          args.enrollments, unenrolled, args.random_seed)
+        engine = db.engine
+    headers = {user: get_user_token_headers(getattr(TEST_USERS, user))
+               for user in ('REGISTRAR', 'INSTRUCTOR')}
+    uids = random.Random(args.random_seed)
+    builders = route_requests(
+        (args.students, args.instructors, args.courses, unenrolled),
+        lambda count: uids.randint(1, max(count, 1))
+    )
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    results = {}
+    try:
+        with QueryCounter(engine) as counter:
+            for route in args.routes:
+                results[route] = run_route(base_url, builders[route],
+                                           headers, args, counter)
+    finally:
+        server.shutdown()
+
+    report = json.dumps({
+        'commit': git_commit(),
+        'database': engine.name,
+        'scale': {'students': args.students,
+                  'instructors': args.instructors,
+                  'courses': args.courses,
+                  'max_enrollments_per_student': args.enrollments},
+        'concurrency': args.concurrency,
+        'routes': results
+    }, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(report + '\n')
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+""" --------------------------------------------------------------------------#
+# IMPORTS
+# --------------------------------------------------------------------------"""
+
+
+import threading
+from collections import OrderedDict
+from config.config import CACHE
+
+
+""" --------------------------------------------------------------------------#
+# RESPONSE CACHES
+# --------------------------------------------------------------------------"""
+
+
+# Counts hits and misses for a response cache. Subclasses implement
+# fetch and store, and get and set count around them.
+# -----------------------------------------------------------------------------
+class ResponseCache:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.counter_lock = threading.Lock()
+
+    # Returns the cached bytes for the key, or None if it isn't cached.
+    def get(self, key):
+        value = self.fetch(key)
+        with self.counter_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    # Caches the bytes for the key.
+    def set(self, key, value):
+        self.store(key, value)
+
+    # Returns the hit and miss counts of this process.
+    def stats(self):
+        with self.counter_lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    # Resets the hit and miss counts.
+    def reset_stats(self):
+        with self.counter_lock:
+            self.hits = self.misses = 0
+
+
+# Keeps responses in process memory, evicting the least recently used
+# responses when there are more than max entries or max bytes of them.
+# -----------------------------------------------------------------------------
+class LRUCache(ResponseCache):
+    def __init__(self, max_bytes=None, max_entries=None):
+        super().__init__()
+        self.max_bytes = CACHE.MAX_BYTES if max_bytes is None else max_bytes
+        self.max_entries = (CACHE.MAX_ENTRIES if max_entries is None
+                            else max_entries)
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    # Returns the cached bytes, marking them most recently used.
+    def fetch(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    # Caches the bytes, then evicts until the cache fits its limits.
+    # Responses larger than the whole cache aren't cached.
+    def store(self, key, value):
+        if len(value) > self.max_bytes or self.max_entries < 1:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = value
+            self.size += len(value)
+            while (self.size > self.max_bytes or
+                   len(self.entries) > self.max_entries):
+                self.size -= len(self.entries.popitem(last=False)[1])
+
+    # Removes every cached response.
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+# Keeps responses in Redis, or any client with Redis' get, set and delete
+# methods, so every worker shares them. Redis evicts with its own
+# maxmemory policy, and the TTL removes entries no longer requested.
+# -----------------------------------------------------------------------------
+class RedisCache(ResponseCache):
+    def __init__(self, client, prefix=None, ttl=None):
+        super().__init__()
+        self.client = client
+        self.prefix = CACHE.PREFIX if prefix is None else prefix
+        self.ttl = CACHE.TTL if ttl is None else ttl
+
+    # Returns the cached bytes from Redis.
+    def fetch(self, key):
+        return self.client.get(self.prefix + key)
+
+    # Caches the bytes in Redis with the TTL.
+    def store(self, key, value):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    # Removes every cached response with the prefix.
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+# Creates the response cache from config, in Redis when a Redis URL is
+# set. The redis package is only needed when it is.
+def create_cache():
+    if CACHE.REDIS_URL:
+        import redis
+        return RedisCache(redis.Redis.from_url(CACHE.REDIS_URL))
+    return LRUCache()
+
+
+# Process-wide cache of serialized course lists.
+catalog_cache = create_cache()
@@ -5,10 +5,13 @@
 # Standard Library dependencies
 import os
 from types import SimpleNamespace
+from urllib.request import pathname2url
 
 # Third party dependencies
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine.url import make_url
 
 
 """ --------------------------------------------------------------------------#
@@ -41,10 +44,50 @@ def create_test_db_path():
     return database_path
 
 
-# Environmental variable for DB paths.
+# Returns the test database path for a parallel test worker, so each
+# worker runs against its own database. The worker id is added to the
+# Postgres database name, or to the SQLite file name. Without a worker
+# id the path is unchanged.
+def worker_db_path(path, worker_id=None):
+    url = make_url(path)
+    if not worker_id or not url.database or url.database == ':memory:':
+        return path
+    name, extension = os.path.splitext(url.database)
+    if url.get_backend_name() != 'sqlite':
+        name, extension = url.database, ''
+    url.database = f'{name}-{worker_id}{extension}'
+    return str(url)
+
+
+# Creates the Postgres database at the path if it doesn't exist, so each
+# test worker can provision its own. SQLite creates database files when
+# they are opened.
+def create_database(path):
+    url = make_url(path)
+    if not url.get_backend_name().startswith('postgres'):
+        return
+    database = url.database
+    url.database = 'postgres'
+    engine = create_engine(url, isolation_level='AUTOCOMMIT')
+    try:
+        with engine.connect() as connection:
+            exists = connection.execute(
+                text('SELECT 1 FROM pg_database WHERE datname = :name'),
+                name=database
+            ).scalar()
+            if not exists:
+                connection.execute(f'CREATE DATABASE "{database}"')
+    finally:
+        engine.dispose()
+
+
+# Environmental variable for DB paths. Parallel test workers are named by
+# TEST_WORKER_ID, or by pytest-xdist.
 database_path = os.getenv('DATABASE_URL', database_path)
-test_database_path = os.getenv('HEROKU_POSTGRESQL_COPPER_URL',
-                               create_test_db_path())
+test_database_path = worker_db_path(
+    os.getenv('HEROKU_POSTGRESQL_COPPER_URL', create_test_db_path()),
+    os.getenv('TEST_WORKER_ID') or os.getenv('PYTEST_XDIST_WORKER')
+)
 
 # Define db
 db = SQLAlchemy()
@@ -56,6 +99,16 @@ def setup_db(app, db_path=None):
         db_path = database_path
     app.config["SQLALCHEMY_DATABASE_URI"] = db_path
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Send executemany batches to Postgres as multi-row VALUES statements
+    # rather than a statement per row, which makes bulk inserts fast. The
+    # option is cleared for other databases, which don't accept it, when
+    # an app set up for Postgres is set up again for another database.
+    if db_path.startswith('postgres'):
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+            'executemany_mode': 'values'
+        }
+    else:
+        app.config.pop("SQLALCHEMY_ENGINE_OPTIONS", None)
     db.app = app
     db.init_app(app)
     migrate = Migrate(app, db)
@@ -77,29 +130,88 @@ CLIENT_SECRET = ('IcouX6edbuTSuYEz8F2iwEfyjuJefnKckv6eD'
                  'oQLjRAMluvDJjehIbSHLxBiwaVg')
 
 
-# Auth0 variables oject.
+# Default JSON web key set cache settings, in seconds:
+#   - TTL is how long fetched keys are used before being revalidated.
+#   - Min refresh is the shortest time between fetches, which limits
+#     fetches caused by unknown key ids or a failing key set URL.
+#   - Timeout is how long to wait for the key set URL to respond.
+JWKS_TTL = 600
+JWKS_MIN_REFRESH = 30
+JWKS_TIMEOUT = 5
+
+# Default number of verified tokens to cache, 0 disables the cache.
+TOKEN_CACHE_SIZE = 1024
+
+
+# Local token issuer settings. When enabled, test user tokens are minted
+# locally, signed with a generated RS256 key, and verified against a key
+# set file instead of Auth0's, so tests and benchmarks run offline. The
+# key and key set are kept in key dir and shared by every process using
+# it. The default key dir is in the user's home, so other users can't
+# plant a key in it. Token TTL is in seconds.
+LOCAL_AUTH = SimpleNamespace(
+    ENABLED=os.getenv('LOCAL_AUTH', 'false').lower() in ['1', 'true'],
+    KEY_DIR=os.getenv('LOCAL_AUTH_DIR', os.path.join(
+        os.path.expanduser('~'), '.course-enrollments', 'auth'
+    )),
+    KID='course-enrollments-local',
+    TOKEN_TTL=int(os.getenv('LOCAL_AUTH_TOKEN_TTL', 86400))
+)
+LOCAL_AUTH.JWKS_PATH = os.path.join(LOCAL_AUTH.KEY_DIR, 'jwks.json')
+LOCAL_AUTH.KEY_PATH = os.path.join(LOCAL_AUTH.KEY_DIR, 'private_key.pem')
+
+
+# Auth0 variables oject. With the local issuer, keys are read from its
+# key set file.
 AUTH0 = SimpleNamespace(
     DOMAIN=os.getenv('DOMAIN', DOMAIN),
     ALGORITHMS=os.getenv('ALGORITHMS', ALGORITHMS),
     API_AUDIENCE=os.getenv('API_AUDIENCE', API_AUDIENCE),
     CLIENT_ID=os.getenv('CLIENT_ID', CLIENT_ID),
-    CLIENT_SECRET=os.getenv('CLIENT_SECRET', CLIENT_SECRET)
+    CLIENT_SECRET=os.getenv('CLIENT_SECRET', CLIENT_SECRET),
+    JWKS_URL=os.getenv(
+        'JWKS_URL',
+        'file://' + pathname2url(LOCAL_AUTH.JWKS_PATH) if LOCAL_AUTH.ENABLED
+        else f"https://{os.getenv('DOMAIN', DOMAIN)}/.well-known/jwks.json"
+    ),
+    JWKS_TTL=float(os.getenv('JWKS_TTL', JWKS_TTL)),
+    JWKS_MIN_REFRESH=float(os.getenv('JWKS_MIN_REFRESH', JWKS_MIN_REFRESH)),
+    JWKS_TIMEOUT=float(os.getenv('JWKS_TIMEOUT', JWKS_TIMEOUT)),
+    TOKEN_CACHE_SIZE=int(os.getenv('TOKEN_CACHE_SIZE', TOKEN_CACHE_SIZE))
 )
 
 # Default test users.
 # NOTE: If creating your own deployment, these should be
 # updated with your specific test user details.
-DEAN = SimpleNamespace(
-    NAME='dean@rclarkmorrow.com',
-    PASSWORD='TestDean1'
+# Permissions are those of each user's role in Auth0, which the local
+# issuer puts in the tokens it mints.
+INSTRUCTOR = SimpleNamespace(
+    NAME='instructor@rclarkmorrow.com',
+    PASSWORD='TestInstructor1',
+    PERMISSIONS=[
+        'post:course', 'patch:course',
+        'post:grades', 'patch:grade', 'get:course-grades'
+    ]
 )
 REGISTRAR = SimpleNamespace(
     NAME='registrar@rclarkmorrow.com',
-    PASSWORD='TestRegistrar1'
+    PASSWORD='TestRegistrar1',
+    PERMISSIONS=[
+        'get:students', 'get:student', 'post:student', 'patch:student',
+        'delete:student', 'get:student-courses', 'get:student-grades',
+        'get:instructors', 'get:instructor', 'get:instructor-courses',
+        'get:course-students', 'get:course-instructors',
+        'post:enrollment', 'delete:enrollment'
+    ]
 )
-INSTRUCTOR = SimpleNamespace(
-    NAME='instructor@rclarkmorrow.com',
-    PASSWORD='TestInstructor1'
+DEAN = SimpleNamespace(
+    NAME='dean@rclarkmorrow.com',
+    PASSWORD='TestDean1',
+    PERMISSIONS=INSTRUCTOR.PERMISSIONS + REGISTRAR.PERMISSIONS + [
+        'delete:course', 'post:instructor', 'patch:instructor',
+        'delete:instructor', 'post:assignment', 'delete:assignment',
+        'delete:grade', 'get:cache-stats'
+    ]
 )
 
 
@@ -107,15 +219,18 @@ INSTRUCTOR = SimpleNamespace(
 TEST_USERS = SimpleNamespace(
     DEAN=SimpleNamespace(
         NAME=os.getenv('DEAN_NAME', DEAN.NAME),
-        PASSWORD=os.getenv('DEAN_PASSWORD', DEAN.PASSWORD)
+        PASSWORD=os.getenv('DEAN_PASSWORD', DEAN.PASSWORD),
+        PERMISSIONS=DEAN.PERMISSIONS
     ),
     REGISTRAR=SimpleNamespace(
         NAME=os.getenv('REGISTRAR_NAME', REGISTRAR.NAME),
-        PASSWORD=os.getenv('REGISTRAR_PASSWORD', REGISTRAR.PASSWORD)
+        PASSWORD=os.getenv('REGISTRAR_PASSWORD', REGISTRAR.PASSWORD),
+        PERMISSIONS=REGISTRAR.PERMISSIONS
     ),
     INSTRUCTOR=SimpleNamespace(
         NAME=os.getenv('INSTRUCTOR_NAME', INSTRUCTOR.NAME),
-        PASSWORD=os.getenv('INSTRUCTOR_PASSWORD', INSTRUCTOR.PASSWORD)
+        PASSWORD=os.getenv('INSTRUCTOR_PASSWORD', INSTRUCTOR.PASSWORD),
+        PERMISSIONS=INSTRUCTOR.PERMISSIONS
     )
 )
 
@@ -144,6 +259,9 @@ PAGE_LENGTH = SimpleNamespace(
 )
 
 """ Set allowed scheduling:
+    NOTE: Week days lists every day in order. Course days are stored as a
+          bitmask where each day's bit is its position in this list, so
+          its order must not change once courses are stored.
     NOTE: Allowed days is a list of days that courses can be scheduled on, a
           course can occurr in a timeslot on multiple days.
     NOTE: Time values are assumed to be 24 Hour time and are represented as
@@ -157,6 +275,8 @@ PAGE_LENGTH = SimpleNamespace(
             - Max length is the longes ta course can be schedules for.
 """
 SCHEDULE = SimpleNamespace(
+    WEEK_DAYS=['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
+               'Saturday', 'Sunday'],
     ALLOWED_DAYS=['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'],
     MIN_START=450,  # Default is 7:30 am
     MAX_END=990,  # Default is 4:30 pm
@@ -165,6 +285,90 @@ SCHEDULE = SimpleNamespace(
 )
 
 
+# Set transaction retries for enrollments and assignments, which are retried
+# after serialization failures or deadlocks. Backoff is the delay in seconds
+# before the first retry, and doubles for each retry after that.
+TRANSACTION = SimpleNamespace(
+    RETRIES=3,
+    BACKOFF=0.05
+)
+
+
+# Set bulk enrollment limits. Max enrollments caps the pairs accepted in a
+# request, and chunk size caps the uids in each IN clause of the validation
+# queries (older SQLite builds allow at most 999 parameters).
+BULK = SimpleNamespace(
+    MAX_ENROLLMENTS=10000,
+    CHUNK_SIZE=500
+)
+
+
+# Set student and instructor import settings. Records are checked and
+# inserted a chunk at a time, and each chunk is committed. At most max
+# errors row errors are returned, though all are counted.
+IMPORT = SimpleNamespace(
+    CHUNK_SIZE=1000,
+    MAX_ERRORS=1000,
+    FORMATS=['csv', 'ndjson'],
+    CONTENT_TYPES={
+        'text/csv': 'csv',
+        'application/x-ndjson': 'ndjson',
+        'application/ndjson': 'ndjson'
+    }
+)
+
+
+# Set export settings. Rows are fetched from the database and sent to the
+# client in batches of batch size. Permissions are those needed to export
+# each entity, where None needs no authorization, matching the list routes.
+EXPORT = SimpleNamespace(
+    BATCH_SIZE=1000,
+    FORMATS=['ndjson', 'csv'],
+    CONTENT_TYPES={
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson'
+    },
+    PERMISSIONS={
+        'students': 'get:students',
+        'instructors': 'get:instructors',
+        'courses': None,
+        'rosters': 'get:course-students'
+    }
+)
+
+
+# Set the allowed grades, with the grade points each is worth. Default
+# credits are the credits of a course created without credits, and chunk
+# size is the number of students recomputed at a time by manage.py
+# recompute_transcripts.
+GRADES = SimpleNamespace(
+    DEFAULT_CREDITS=3,
+    CHUNK_SIZE=1000,
+    POINTS={
+        'A': 4.0, 'A-': 3.7,
+        'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+        'C+': 2.3, 'C': 2.0, 'C-': 1.7,
+        'D+': 1.3, 'D': 1.0, 'D-': 0.7,
+        'F': 0.0
+    }
+)
+
+
+# Set course list response cache settings. Serialized responses are kept
+# in an in-process LRU of at most max bytes and max entries, or in Redis
+# when a Redis URL is set, so gunicorn workers share them. Entries are
+# keyed by the catalog ETag, so a changed catalog never matches an old
+# entry, and the TTL only limits how long unused entries are kept in
+# Redis.
+CACHE = SimpleNamespace(
+    MAX_BYTES=int(os.getenv('CACHE_MAX_BYTES', 16 * 1024 * 1024)),
+    MAX_ENTRIES=int(os.getenv('CACHE_MAX_ENTRIES', 1024)),
+    REDIS_URL=os.getenv('CACHE_REDIS_URL'),
+    PREFIX=os.getenv('CACHE_PREFIX', 'course-enrollments:'),
+    TTL=int(os.getenv('CACHE_TTL', 3600))
+)
+
+
 """ --------------------------------------------------------------------------#
 # MESSAGES
 # --------------------------------------------------------------------------"""
@@ -185,7 +389,14 @@ SUCCESS = SimpleNamespace(
     ASSIGNMENT_CREATED='assignment created',
     ASSIGNMENT_DELETED='deleted assignment with uid:',
     ENROLLMENT_CREATED='enrollment created',
-    ENROLLMENT_DELETED='deleted enrollment with uid:'
+    ENROLLMENT_DELETED='deleted enrollment with uid:',
+    ENROLLMENTS_PROCESSED='bulk enrollments processed',
+    IMPORTED='import processed',
+    WAITLISTED='course is full, student added to waitlist',
+    WAITLIST_DELETED='deleted waitlist entry with uid:',
+    GRADES_POSTED='grades posted',
+    GRADE_EDITED='updated grade with uid:',
+    GRADE_DELETED='deleted grade with uid:'
 )
 
 STATUS_ERR = SimpleNamespace(
@@ -211,6 +422,8 @@ STATUS_ERR = SimpleNamespace(
     NO_RECORD='one or more provided uids not found in database',
     NO_RECORDS='no records found in database.',
     BAD_PAGE='the page argument must be an integer above zero.',
+    BAD_CURSOR='the cursor argument is invalid, use a returned next_cursor',
+    PAGE_AND_CURSOR='use either the page or the cursor argument, not both',
     BAD_PHONE='phone numbers must be in formats: 1234567890 or 123-456-7890',
     BAD_EMAIL='the email provided is invalid.',
     UNIQUE_GENERIC='at least one key needs to be a unique value',
@@ -218,6 +431,25 @@ STATUS_ERR = SimpleNamespace(
     BAD_ID='uids must be provided as integers',
     CONFLICT='a course is arleady scheduled for this time',
     DUPLICATE='a matching record already exists',
+    BAD_CAPACITY='capacity must be a positive integer or null',
+    BAD_CREDITS='credits must be a positive integer',
+    CAPACITY_TAKEN='capacity cannot be less than the seats already taken',
+    WAITLISTED='student is already on the waitlist for this course',
+    BULK_LIST='enrollments must be provided as a list of enrollments',
+    BULK_SIZE=(f'too many enrollments, send at most {BULK.MAX_ENROLLMENTS}'
+               ' in a request'),
+    BULK_DUPLICATE='the enrollment is repeated in the request',
+    BAD_FORMAT=('imports must be csv or ndjson, set with the format argument'
+                ' or the content type'),
+    BAD_ROW='the row could not be read',
+    BAD_EXPORT=('exports must be students, instructors, courses or rosters'
+                ' as csv or ndjson'),
+    BAD_VALUE='values must be provided as strings',
+    GRADE_LIST='grades must be provided as a list of grades',
+    BAD_GRADE='grades must be one of: ' + ', '.join(GRADES.POINTS.keys()),
+    GRADE_DUPLICATE='the student is repeated in the request',
+    GRADE_ERRORS='at least one grade is invalid, no grades were posted',
+    NOT_ENROLLED='the student is not enrolled in the course',
     # Authorization error descriptions.
     HEADER_MISSING='authorization header expected',
     BEARER_MISSING='authorization header must start with bearer',
@@ -3,17 +3,32 @@
 # --------------------------------------------------------------------------"""
 
 # Standard library dependencies
+import base64
+import csv
+import io
+import json
 import re
+from collections import Counter, defaultdict
+from functools import partial
+from time import sleep
 from types import SimpleNamespace
 
 # Third party Dependencies
-from flask import jsonify
+from flask import Response, stream_with_context
+from sqlalchemy import and_, bindparam, case, func, or_, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import joinedload, selectinload
 
 # Local application dependencies
+from cache.cache import catalog_cache
 from database.models import (Student, Instructor, Course, Assignment,
-                             Enrollment)
-from config.config import REGEX, PAGE_LENGTH, SCHEDULE, STATUS_ERR, SUCCESS
-from helpers.helpers import StatusError
+                             Enrollment, Grade, Transcript, Waitlist)
+from config.config import (db, BULK, EXPORT, GRADES, IMPORT, REGEX,
+                           PAGE_LENGTH, SCHEDULE, STATUS_ERR, SUCCESS,
+                           TRANSACTION)
+from helpers.helpers import (StatusError, days_to_mask, json_response,
+                             mask_to_days, minutes_to_time, quality_points,
+                             read_import_records, schedules_overlap)
 
 
 """ --------------------------------------------------------------------------#
@@ -34,28 +49,62 @@ class Controller:
             self.uid = self.string_to_int(uid)
         self.response_data = SimpleNamespace(success=True)
         self.status = SimpleNamespace(error=False)
+        self.etag = None
 
     """ BUILDERS
     # ----------------------------------------------------------------------"""
-    # Generates JSON response.
+    # Generates JSON response, with an ETag if one was set.
     def generate_response(self):
-        self.response = jsonify(self.response_data.__dict__), 200
+        response = json_response(self.response_data.__dict__)
+        if self.etag:
+            response.set_etag(self.etag)
+        self.response = response, 200
+
+    # Sets the ETag for the response, and returns whether the client's
+    # If-None-Match already has it. When it does the response is a 304
+    # Not Modified, so the records are never loaded or serialized.
+    def not_modified(self, etag, if_none_match=None):
+        self.etag = etag
+        if if_none_match and if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            self.response = response
+            return True
+        return False
 
     # Adds records to class object with argument that determines
     # whether the records have full details or truncated details
-    # and arguments that determine paginated response.
+    # and arguments that determine paginated response. Pages can be
+    # requested by number (page) or by an opaque keyset cursor (cursor)
+    # returned as next_cursor by the previous page.
     def append_records_list(self, table=None, detail='full',
-                            page_length=10, page=None):
-        # Get all records as a query object.
-        query = self.get_all_records()
-        self.response_data.total_records = len(query)
-        # If page is none, returns all records.
-        if page is None:
-            start = 0
-            stop = None
-        # Checks if page can be converted to a positive integer, and
-        # paginates response. Otherwise, returns a 422 error.
+                            page_length=10, page=None, cursor=None,
+                            options=()):
+        # Get records as an ordered query object, with any loader options.
+        # Short listings select only the table's short columns as rows,
+        # so full rows and model instances are never loaded.
+        query = self.get_records_query(
+            options=options,
+            columns=self.table.SHORT_COLUMNS if detail == 'short' else None
+        )
+        # Page and cursor are alternative pagination modes.
+        if page is not None and cursor is not None:
+            raise StatusError(
+                STATUS_ERR.CODE_422,
+                STATUS_ERR.PAGE_AND_CURSOR,
+                422
+            )
+        # Keyset pagination: seek past the last uid of the previous page
+        # so deep pages cost the same as the first page. Total records
+        # is not counted, as a COUNT on every page would scan the table.
+        if cursor is not None:
+            query = query.filter(self.table.uid > self.decode_cursor(cursor))
+        # Count the records in the table without loading them.
         else:
+            self.response_data.total_records = self.count_records()
+        # Checks if page can be converted to a positive integer, and
+        # offsets the query to that page. Otherwise, returns a 422 error.
+        if page is not None:
             page = self.string_to_int(page)
             if page < 1:
                 raise StatusError(
@@ -63,28 +112,64 @@ class Controller:
                     STATUS_ERR.BAD_PAGE,
                     422
                 )
-            start = (page - 1) * page_length
-            stop = start + page_length
+            query = query.offset((page - 1) * page_length)
+        # If page and cursor are none, returns all records. Otherwise,
+        # fetches one extra record to tell whether there is a next page.
+        if page is not None or cursor is not None:
+            records = query.limit(page_length + 1).all()
+            has_next = len(records) > page_length
+            records = records[:page_length]
+        else:
+            records = query.all()
+            has_next = False
         # Structure details
         if detail == 'full':
-            self.records = (([record.full() for record in query])[start:stop])
+            self.records = [record.full() for record in records]
         elif detail == 'short':
-            self.records = (([record.short() for record in query])[start:stop])
+            self.records = [record._asdict() for record in records]
         # Check length of records, error if there are none.
         if len(self.records) < 1:
             raise StatusError(STATUS_ERR.CODE_404, STATUS_ERR.NO_RECORDS, 404)
+        # Add a cursor for the next page to paginated responses.
+        if page is not None or cursor is not None:
+            self.response_data.next_cursor = (
+                self.encode_cursor(records[-1].uid) if has_next else None
+            )
 
     """ UTILITY HELPERS
     # ----------------------------------------------------------------------"""
     # Converts a uid passed as a string to an integer value, returns
-    # an HTTP error if it is not possible.
+    # an HTTP error if it is not possible or the value is not an integer
+    # or a string.
     def string_to_int(self, int_string):
         if (type(int_string)) != int:
             try:
+                if type(int_string) != str:
+                    raise ValueError
                 int_string = int(int_string)
                 return int_string
             except ValueError:
                 raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.BAD_INT, 422)
+        return int_string
+
+    # Encodes the uid of the last record on a page as an opaque cursor.
+    def encode_cursor(self, uid):
+        return (base64.urlsafe_b64encode(f'uid:{uid}'.encode())
+                .decode().rstrip('='))
+
+    # Decodes a cursor created by encode_cursor and returns the uid it
+    # holds, returns an HTTP error if the cursor is invalid. Uids are
+    # positive and fit the database's 32-bit integer columns.
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            decoded = base64.urlsafe_b64decode(cursor + padding).decode()
+            prefix, uid = decoded.split(':')
+            if prefix != 'uid' or not 0 < int(uid) < 2 ** 31:
+                raise ValueError
+            return int(uid)
+        except ValueError:
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.BAD_CURSOR, 422)
 
     # Converts a time string to an integer value expressed as minutes.
     def time_to_int(self, time_string):
@@ -132,9 +217,18 @@ class Controller:
         return email.lower()
 
     # Verify request data is valid.
-    def verify_request_data(self, valid_keys, strict=False):
+    def verify_request_data(self, valid_keys, strict=False,
+                            optional_keys=()):
+        # Verifies that the request body is a JSON object, so a missing
+        # body or a list has no keys.
+        if type(self.request_data) != dict:
+            raise StatusError(
+                STATUS_ERR.CODE_422,
+                STATUS_ERR.MISSING_KEY if strict else STATUS_ERR.BAD_KEY,
+                422
+            )
         # Verifies that all valid keys are present in the
-        # request body.
+        # request body, optional keys may be left out.
         if strict is True:
             for data in valid_keys:
                 if data not in self.request_data.keys():
@@ -146,7 +240,7 @@ class Controller:
         # Verifies that there are no invalid keys present
         # in the request body.
         for key in self.request_data.keys():
-            if key not in valid_keys:
+            if key not in valid_keys and key not in optional_keys:
                 raise StatusError(
                     STATUS_ERR.CODE_422,
                     STATUS_ERR.BAD_KEY,
@@ -166,66 +260,104 @@ class Controller:
             raise StatusError(STATUS_ERR.CODE_422, message, 422)
 
     # Verifies that an assignment or enrollment isn't a duplicate and that
-    # it doesn't conflict with another assignment or enrollment.
-    def verify_schedule(self, course, person, uid_check=True,
+    # it doesn't conflict with another assignment or enrollment of the
+    # provided people (a uid list or subquery). A single query looks for
+    # courses they share days with that overlap the course's times, with
+    # a duplicate of the course itself returned first.
+    def verify_schedule(self, course, table, person_key, persons,
                         exclude_uid=None):
-        for record in person:
-            start = record.course.start_time
-            end = record.course.end_time
-            days = record.course.days
-            if uid_check:
-                # Verify unique assignment or enrollment.
-                if record.course_uid == self.request_data['course_uid']:
-                    raise StatusError(STATUS_ERR.CODE_422,
-                                      STATUS_ERR.DUPLICATE, 422)
-            # Exclude check against provided course_uid.
-            if exclude_uid != record.course.uid:
-                # Loop through days.
-                for day in course.days:
-                    # Check for matching day.
-                    if day in days:
-                        # Verify that there are no scheduling conflicts.
-                        if ((course.start_time > start
-                                and course.start_time < end) or
-                                (course.end_time > start and
-                                    course.end_time < end)):
-                            raise StatusError(STATUS_ERR.CODE_422,
-                                              STATUS_ERR.CONFLICT, 422)
+        overlap = and_(Course.days.op('&')(course.days) != 0,
+                       Course.start_time < course.end_time,
+                       Course.end_time > course.start_time)
+        query = (
+            db.session.query(Course.uid)
+            .join(table, table.course_uid == Course.uid)
+            .filter(getattr(table, person_key).in_(persons))
+        )
+        # Exclude check against provided course_uid.
+        if exclude_uid is not None:
+            query = query.filter(Course.uid != exclude_uid)
+        # Check for duplicates of a course that is already stored.
+        if course.uid is not None:
+            query = (query.filter(or_(Course.uid == course.uid, overlap))
+                     .order_by(case([(Course.uid == course.uid, 0)],
+                                    else_=1)))
+        else:
+            query = query.filter(overlap)
+        conflict_uid = query.limit(1).scalar()
+        if conflict_uid is not None and conflict_uid == course.uid:
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.DUPLICATE, 422)
+        elif conflict_uid is not None:
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.CONFLICT, 422)
 
     """ DATABASE HELPERS
     # ----------------------------------------------------------------------"""
-    # Builds a new record and inserts in the database.
-    def create_record(self):
+    # Builds a new record and inserts in the database. Returns an HTTP
+    # error with the provided message if a unique constraint is violated.
+    def create_record(self, message=STATUS_ERR.DUPLICATE):
         self.record = self.table()
         for key, value in self.request_data.items():
             if type(value) is str:
                 value = value.strip()
             setattr(self.record, key, value)
-        self.record.insert()
+        try:
+            self.record.insert()
+        except IntegrityError:
+            db.session.rollback()
+            raise StatusError(STATUS_ERR.CODE_422, message, 422)
 
-    def edit_record(self):
+    # Applies request data to a record and updates the database. Returns
+    # an HTTP error with the provided message if a unique constraint is
+    # violated.
+    def edit_record(self, message=STATUS_ERR.UNIQUE_GENERIC):
         for key, value in self.request_data.items():
             setattr(self.record, key, value)
-        self.record.update()
+        try:
+            self.record.update()
+        except IntegrityError:
+            db.session.rollback()
+            raise StatusError(STATUS_ERR.CODE_422, message, 422)
 
     # Gets record by ID and deletes it.
     def delete_record(self):
         self.record = self.get_record_by_id()
         self.record.delete()
 
-    # Get all records from provided table.
-    def get_all_records(self):
+    # Get a query for all records from provided table, ordered by uid.
+    # Loader options can be passed to eager load relationships, or columns
+    # to select only those columns as rows.
+    def get_records_query(self, options=(), columns=None):
+        if self.table and columns:
+            return (db.session.query(*[getattr(self.table, column)
+                                       for column in columns])
+                    .order_by(self.table.uid))
+        if self.table:
+            return (self.table.query.options(*options)
+                    .order_by(self.table.uid))
+        else:
+            raise StatusError(STATUS_ERR.CODE_500, STATUS_ERR.GENERIC, 500)
+
+    # Count all records in provided table with a single COUNT query.
+    def count_records(self):
         if self.table:
-            return self.table.query.order_by(self.table.uid).all()
+            return (self.table.query
+                    .with_entities(func.count(self.table.uid)).scalar())
         else:
             raise StatusError(STATUS_ERR.CODE_500, STATUS_ERR.GENERIC, 500)
 
-    # Get a single record by provided table.
-    def get_record_by_id(self, table=None, uid=None):
+    # Get a single record by provided table. Loader options can be passed
+    # to eager load relationships, and lock holds a row lock on the record
+    # until the transaction ends.
+    def get_record_by_id(self, table=None, uid=None, options=(),
+                         lock=False):
         if not table:
             table = self.table
             uid = self.uid
-        record = (table.query.filter(table.uid == uid).one_or_none())
+        query = table.query.options(*options).filter(table.uid == uid)
+        if lock:
+            self.lock_for_write()
+            query = query.with_for_update()
+        record = query.one_or_none()
         if not record:
             raise StatusError(
                 STATUS_ERR.CODE_404,
@@ -234,25 +366,272 @@ class Controller:
             )
         return(record)
 
+    # Runs a query for the rows whose column is in a set of uids, one
+    # chunk of uids at a time to keep the IN clauses small, and yields the
+    # rows in uid order. Lock holds row locks on the rows, taken in uid
+    # order so concurrent requests lock in the same order.
+    def select_in(self, query, column, uids, lock=False):
+        uids = sorted(uids)
+        if lock:
+            self.lock_for_write()
+            query = query.with_for_update()
+        for start in range(0, len(uids), BULK.CHUNK_SIZE):
+            chunk = uids[start:start + BULK.CHUNK_SIZE]
+            yield from query.filter(column.in_(chunk)).order_by(column)
+
     # Get a course record and a person (Student or Instructor) record from
-    # the databalse with provided details.
-    def get_course_and_person(self, table, person_uid):
+    # the databalse with provided details. Lock holds a row lock on the
+    # person, which is taken first so concurrent requests lock in the same
+    # order.
+    def get_course_and_person(self, table, person_uid, lock=False):
+        person = self.get_record_by_id(
+                table=table,
+                uid=self.request_data[person_uid],
+                lock=lock
+            )
         course = self.get_record_by_id(
                 table=Course,
                 uid=self.request_data['course_uid']
             )
-        person = self.get_record_by_id(
-                table=table,
-                uid=self.request_data[person_uid]
-            )
         if not course or not person:
             raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.INV_ID, 422)
         return course, person
 
+    """ TRANSACTION HELPERS
+    # ----------------------------------------------------------------------"""
+    # SQLite has no row locks, so when it stands in for Postgres the whole
+    # database is locked for writing before a row lock would be taken.
+    def lock_for_write(self):
+        if db.engine.dialect.name == 'sqlite':
+            connection = db.session.connection().connection
+            if not connection.in_transaction:
+                db.session.execute('BEGIN IMMEDIATE')
+
+    # Runs a database operation as a transaction, rolling back if it fails
+    # and retrying transient failures (serialization failures, deadlocks
+    # and locked SQLite databases) with a growing delay.
+    def run_transaction(self, operation):
+        for attempt in range(TRANSACTION.RETRIES + 1):
+            try:
+                return operation()
+            except OperationalError as error:
+                db.session.rollback()
+                if (attempt == TRANSACTION.RETRIES or
+                        not self.is_transient(error)):
+                    raise
+                sleep(TRANSACTION.BACKOFF * (2 ** attempt))
+            except Exception:
+                db.session.rollback()
+                raise
+
+    # Checks whether a database error is worth retrying.
+    def is_transient(self, error):
+        return (getattr(error.orig, 'pgcode', None) in ['40001', '40P01'] or
+                'database is locked' in str(error.orig))
+
+    """ IMPORT HELPERS
+    # ----------------------------------------------------------------------"""
+    # Imports person (Student or Instructor) records from CSV or NDJSON
+    # lines. Records are read, checked and inserted a chunk at a time, so
+    # an import of any size is never held in memory, and each chunk is
+    # committed. Errors are reported with their row number.
+    def import_records(self, lines, file_format):
+        self.response_data.created = 0
+        self.response_data.failed = 0
+        self.response_data.errors = []
+        chunk = []
+        for number, record, error in read_import_records(lines, file_format):
+            if not error:
+                record, error = self.read_import_record(record)
+            if error:
+                self.add_import_error(number, error)
+                continue
+            chunk.append((number, record))
+            if len(chunk) == IMPORT.CHUNK_SIZE:
+                self.run_transaction(partial(self.insert_import_chunk, chunk))
+                chunk = []
+        if chunk:
+            self.run_transaction(partial(self.insert_import_chunk, chunk))
+
+    # Checks an imported record like a request body, returning the record
+    # formatted for the database or the description of its error.
+    def read_import_record(self, record):
+        self.request_data = record
+        try:
+            self.verify_request_data(self.valid_keys, strict=True)
+            if any(type(value) is not str for value in record.values()):
+                raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.BAD_VALUE,
+                                  422)
+            record = {key: value.strip() for key, value in record.items()}
+            record['phone'] = self.verify_phone(record['phone'])
+            record['email'] = self.verify_email(record['email'])
+        except StatusError as error:
+            return None, error.description
+        return record, None
+
+    # Inserts a chunk of imported records with one executemany, skipping
+    # records whose email is taken, with one query to find taken emails.
+    # If another request takes an email before the commit, the chunk is
+    # checked again, and if it still conflicts its records are reported as
+    # taken, so the chunks committed before it are still reported.
+    def insert_import_chunk(self, chunk):
+        records, errors = self.check_import_chunk(chunk)
+        if not self.commit_import_records(records):
+            records, errors = self.check_import_chunk(chunk)
+            if not self.commit_import_records(records):
+                records, errors = [], [number for number, record in chunk]
+        self.response_data.created += len(records)
+        for number in errors:
+            self.add_import_error(number, STATUS_ERR.UNIQUE_EMAIL)
+
+    # Splits a chunk of imported records into the records to insert and
+    # the row numbers of records whose email is taken.
+    def check_import_chunk(self, chunk):
+        taken = {row.email for row in self.select_in(
+            db.session.query(self.table.email), self.table.email,
+            {record['email'] for number, record in chunk}
+        )}
+        records, errors = [], []
+        for number, record in chunk:
+            if record['email'] in taken:
+                errors.append(number)
+            else:
+                taken.add(record['email'])
+                records.append(record)
+        return records, errors
+
+    # Inserts imported records and commits them, returning false if an
+    # email was taken since they were checked.
+    def commit_import_records(self, records):
+        try:
+            if records:
+                db.session.execute(self.table.__table__.insert(), records)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        return True
+
+    # Counts an import error, and adds it to the response until there are
+    # IMPORT.MAX_ERRORS.
+    def add_import_error(self, number, description):
+        self.response_data.failed += 1
+        if len(self.response_data.errors) < IMPORT.MAX_ERRORS:
+            self.response_data.errors.append({
+                'row': number,
+                'description': description
+            })
+
+    """ CACHE HELPERS
+    # ----------------------------------------------------------------------"""
+    # Sets the response to the cached bytes for the key, and returns
+    # whether they were cached.
+    def cached_response(self, cache, key):
+        body = cache.get(key)
+        if body is None:
+            return False
+        response = Response(body, mimetype='application/json')
+        if self.etag:
+            response.set_etag(self.etag)
+        response.headers['X-Cache'] = 'HIT'
+        self.response = response, 200
+        return True
+
+    # Caches the bytes of the generated response for the key.
+    def cache_response(self, cache, key):
+        response = self.response[0]
+        cache.set(key, response.get_data())
+        response.headers['X-Cache'] = 'MISS'
+
+    """ TRANSCRIPT HELPERS
+    # ----------------------------------------------------------------------"""
+    # Adds grade changes to students' transcript totals with one upsert
+    # executemany. Changes are (student_uid, credits, points) tuples, and
+    # are added in the database so concurrent changes aren't lost. The
+    # caller commits them with the grade changes.
+    def update_transcripts(self, changes):
+        rows = [{'student_uid': student_uid, 'credits': credits,
+                 'points': points}
+                for student_uid, credits, points in changes
+                if credits or points]
+        if rows:
+            db.session.execute(text(
+                'INSERT INTO transcript (student_uid, credits, points) '
+                'VALUES (:student_uid, :credits, :points) '
+                'ON CONFLICT (student_uid) DO UPDATE SET '
+                'credits = transcript.credits + excluded.credits, '
+                'points = transcript.points + excluded.points'
+            ), rows)
+
+    # Gets the transcript changes for reweighting a course's grades from
+    # old credits to new credits, which is removing them when new credits
+    # are zero.
+    def course_transcript_changes(self, course_uid, old_credits,
+                                  new_credits):
+        grades = (db.session.query(Grade.student_uid, Grade.grade)
+                  .filter(Grade.course_uid == course_uid))
+        return [(grade.student_uid, new_credits - old_credits,
+                 quality_points(grade.grade, new_credits) -
+                 quality_points(grade.grade, old_credits))
+                for grade in grades]
+
+    """ SEAT HELPERS
+    # ----------------------------------------------------------------------"""
+    # Takes a seat in a course with a single conditional update, so the
+    # check and the increment are atomic. Returns false if the course is
+    # full.
+    def take_seat(self, course_uid):
+        taken = (
+            Course.query
+            .filter(Course.uid == course_uid,
+                    or_(Course.capacity.is_(None),
+                        Course.seats_taken < Course.capacity))
+            .update({Course.seats_taken: Course.seats_taken + 1},
+                    synchronize_session=False)
+        )
+        return taken == 1
+
+    # Releases a seat in a course and fills it from the waitlist.
+    def release_seat(self, course_uid):
+        (Course.query
+         .filter(Course.uid == course_uid, Course.seats_taken > 0)
+         .update({Course.seats_taken: Course.seats_taken - 1},
+                 synchronize_session=False))
+        self.promote_waitlist(course_uid)
+
+    # Enrolls waitlisted students in the order they joined the waitlist
+    # until the course is full. Students whose schedule now conflicts
+    # with the course keep their place. Changes are flushed, the caller
+    # commits them.
+    def promote_waitlist(self, course_uid):
+        course = db.session.query(Course).get(course_uid)
+        entries = (Waitlist.query.filter(Waitlist.course_uid == course_uid)
+                   .order_by(Waitlist.uid).all())
+        for entry in entries:
+            self.get_record_by_id(table=Student, uid=entry.student_uid,
+                                  lock=True)
+            try:
+                self.verify_schedule(course=course, table=Enrollment,
+                                     person_key='student_uid',
+                                     persons=[entry.student_uid])
+            except StatusError:
+                continue
+            if not self.take_seat(course_uid):
+                break
+            db.session.add(Enrollment(course_uid=course_uid,
+                                      student_uid=entry.student_uid))
+            db.session.delete(entry)
+            db.session.flush()
+
 
 # Controller class for the Student databale model.
 # -----------------------------------------------------------------------------
 class Students(Controller):
+    # Loads student enrollments with their courses in one extra query.
+    with_enrollments_options = (
+        selectinload(Student.enrollments).joinedload(Enrollment.course),
+    )
+
     # Init self with super.
     def __init__(self, **kwargs):
         super().__init__(table=Student, **kwargs)
@@ -263,9 +642,9 @@ class Students(Controller):
     # ----------------------------------------------------------------------"""
     # Returns a list of students. Page length can be configured in config.py
     def list_students(self, detail='full', page_length=PAGE_LENGTH.STUDENTS,
-                      page=None):
+                      page=None, cursor=None):
         self.append_records_list(detail=detail, page_length=page_length,
-                                 page=page)
+                                 page=page, cursor=cursor)
         self.response_data.students = self.records
         self.generate_response()
 
@@ -277,7 +656,9 @@ class Students(Controller):
 
     # Gets a single course record with students
     def get_student_with_courses(self):
-        self.record = self.get_record_by_id()
+        self.record = self.get_record_by_id(
+            options=self.with_enrollments_options
+        )
         self.response_data.student = self.record.with_enrollments()
         self.generate_response()
 
@@ -297,7 +678,7 @@ class Students(Controller):
         self.check_unique(key='email', value=self.request_data['email'],
                           message=STATUS_ERR.UNIQUE_EMAIL)
         # Create the student record and insert it.
-        self.create_record()
+        self.create_record(message=STATUS_ERR.UNIQUE_EMAIL)
         # Generate response.
         self.response_data.message = SUCCESS.STUDENT_CREATED
         self.generate_response()
@@ -325,21 +706,44 @@ class Students(Controller):
                 uid=self.record.uid
             )
         # Build edits to student record and update it.
-        self.edit_record()
+        self.edit_record(message=STATUS_ERR.UNIQUE_EMAIL)
         # Generate response.
         self.response_data.message = f'{SUCCESS.STUDENT_EDITED} {self.uid}'
         self.generate_response()
 
+    # Imports student records from CSV or NDJSON lines.
+    def import_students(self, lines, file_format):
+        self.import_records(lines, file_format)
+        self.response_data.message = SUCCESS.IMPORTED
+        self.generate_response()
+
     # Deletes a student record.
     def delete_student(self):
-        self.delete_record()
+        self.run_transaction(self.remove_student)
         self.response_data.message = f'{SUCCESS.STUDENT_DELETED} {self.uid}'
         self.generate_response()
 
+    # Deletes a student and fills the seats of their enrollments as one
+    # transaction.
+    def remove_student(self):
+        self.record = self.get_record_by_id(lock=True)
+        course_uids = [enrollment.course_uid
+                       for enrollment in self.record.enrollments]
+        db.session.delete(self.record)
+        db.session.flush()
+        for course_uid in course_uids:
+            self.release_seat(course_uid)
+        db.session.commit()
+
 
 # Controller class for the Instructor databale model.
 # -----------------------------------------------------------------------------
 class Instructors(Controller):
+    # Loads instructor assignments with their courses in one extra query.
+    with_assignments_options = (
+        selectinload(Instructor.assignments).joinedload(Assignment.course),
+    )
+
     # Init self with super.
     def __init__(self, **kwargs):
         super().__init__(table=Instructor, **kwargs)
@@ -350,9 +754,10 @@ class Instructors(Controller):
     # ----------------------------------------------------------------------"""
     # Returns a list of students. Page length can be configured in config.py
     def list_instructors(self, detail='full',
-                         page_length=PAGE_LENGTH.INSTRUCTORS, page=None):
+                         page_length=PAGE_LENGTH.INSTRUCTORS, page=None,
+                         cursor=None):
         self.append_records_list(detail=detail, page_length=page_length,
-                                 page=page)
+                                 page=page, cursor=cursor)
         self.response_data.instructors = self.records
         self.generate_response()
 
@@ -364,7 +769,9 @@ class Instructors(Controller):
 
     # Gets a single instructor record with courses.
     def get_instructor_with_courses(self):
-        self.record = self.get_record_by_id()
+        self.record = self.get_record_by_id(
+            options=self.with_assignments_options
+        )
         self.response_data.instructor = self.record.with_assignments()
         self.generate_response()
 
@@ -384,7 +791,7 @@ class Instructors(Controller):
         self.check_unique(key='email', value=self.request_data['email'],
                           message=STATUS_ERR.UNIQUE_EMAIL)
         # Create the student record and insert it.
-        self.create_record()
+        self.create_record(message=STATUS_ERR.UNIQUE_EMAIL)
         # Generate response.
         self.response_data.message = SUCCESS.INSTRUCTOR_CREATED
         self.generate_response()
@@ -412,11 +819,17 @@ class Instructors(Controller):
                 uid=self.record.uid
             )
         # Build edits to student record and update it.
-        self.edit_record()
+        self.edit_record(message=STATUS_ERR.UNIQUE_EMAIL)
         # Generate response.
         self.response_data.message = f'{SUCCESS.INSTRUCTOR_EDITED} {self.uid}'
         self.generate_response()
 
+    # Imports instructor records from CSV or NDJSON lines.
+    def import_instructors(self, lines, file_format):
+        self.import_records(lines, file_format)
+        self.response_data.message = SUCCESS.IMPORTED
+        self.generate_response()
+
     # Deletes a student record.
     def delete_instructor(self):
         self.delete_record()
@@ -427,53 +840,102 @@ class Instructors(Controller):
 # Controller class for the Course databale model.
 # -----------------------------------------------------------------------------
 class Courses(Controller):
+    # Loads course assignments with their instructors in one extra query,
+    # so serializing any number of courses uses a fixed number of queries.
+    with_instructors_options = (
+        selectinload(Course.assignments).joinedload(Assignment.instructor),
+    )
+    # Loads course enrollments with their students in one extra query.
+    with_students_options = (
+        selectinload(Course.enrollments).joinedload(Enrollment.student),
+    )
+
     # Init self with super.
     def __init__(self, **kwargs):
         super().__init__(table=Course, **kwargs)
         # Set valid keys for course record.
         self.valid_keys = ['title', 'days', 'description',
                            'start_time', 'end_time']
+        self.optional_keys = ['capacity', 'credits']
 
     """ ROUTE HANDLERS
     # ----------------------------------------------------------------------"""
     # Returns a list of courses. Page length can be configured in config.py.
     def list_courses(self, detail='full', page_length=PAGE_LENGTH.COURSES,
-                     page=None):
-        self.append_records_list(detail=detail, page_length=page_length,
-                                 page=page)
+                     page=None, cursor=None, if_none_match=None):
+        if self.not_modified(self.catalog_etag(), if_none_match):
+            return
+        # Serve the list from the cache, keyed by the catalog ETag so any
+        # change to the catalog misses, or build and cache it.
+        key = f'{self.etag}:{detail}:{page_length}:{page}:{cursor}'
+        if self.cached_response(catalog_cache, key):
+            return
+        self.append_records_list(
+            detail=detail, page_length=page_length, page=page, cursor=cursor,
+            options=self.with_instructors_options if detail == 'full' else ()
+        )
         self.response_data.courses = self.records
         self.generate_response()
+        self.cache_response(catalog_cache, key)
 
-    # Gets a single course record
-    def get_course(self):
-        self.record = self.get_record_by_id()
+    # Gets the course list cache's hit and miss counts, which are counted
+    # by each server process.
+    def get_cache_stats(self):
+        self.response_data.cache = catalog_cache.stats()
+        self.generate_response()
+
+    # Gets a single course record. A conditional request reads only the
+    # course's version, and a missing course falls through to the 404.
+    def get_course(self, if_none_match=None):
+        if if_none_match:
+            version = (db.session.query(Course.version)
+                       .filter(Course.uid == self.uid).scalar())
+            if version and self.not_modified(self.course_etag(version),
+                                             if_none_match):
+                return
+        self.record = self.get_record_by_id(
+            options=self.with_instructors_options
+        )
+        self.etag = self.course_etag(self.record.version)
         self.response_data.course = self.record.full()
         self.generate_response()
 
     # Gets a single course record with students
     def get_course_with_students(self):
-        self.record = self.get_record_by_id()
+        self.record = self.get_record_by_id(
+            options=self.with_students_options
+        )
         self.response_data.course = self.record.with_students()
         self.generate_response()
 
     # Gets a single course record with instructors
     def get_course_with_instructors(self):
-        self.record = self.get_record_by_id()
+        self.record = self.get_record_by_id(
+            options=self.with_instructors_options
+        )
         self.response_data.course = self.record.with_instructors()
         self.generate_response()
 
     # Creates a new course record.
     def create_course(self):
         # Verify required keys exist in body of JSON request.
-        self.verify_request_data(self.valid_keys, strict=True)
+        self.verify_request_data(self.valid_keys, strict=True,
+                                 optional_keys=self.optional_keys)
         # Verify valid days.
         self.verify_days()
+        # Verify capacity and credits, if there are any.
+        if 'capacity' in self.request_data.keys():
+            self.verify_capacity()
+        if 'credits' in self.request_data.keys():
+            self.verify_credits()
         # Verify valid times.
         self.verify_time([self.request_data['start_time'],
                           self.request_data['end_time']])
         # Verify times are valid for scheduling
         self.verify_course_times(self.request_data['start_time'],
                                  self.request_data['end_time'])
+        # Convert times to minutes for the database.
+        self.convert_times()
         #  Create the course record and insert it.
         self.create_record()
         # Generate response.
@@ -483,49 +945,60 @@ class Courses(Controller):
     # Updates a course record.
     def edit_course(self):
         # Verify valid keys exists in body of JSON request.
-        self.verify_request_data(self.valid_keys)
-        # Get the record to edit.
-        self.record = self.get_record_by_id()
+        self.verify_request_data(self.valid_keys,
+                                 optional_keys=self.optional_keys)
+        # Get the record to edit, locked while capacity or credits change
+        # so seats can't be taken before the capacity is checked, and
+        # grades can't be posted while transcripts are reweighted.
+        self.record = self.get_record_by_id(
+            lock=('capacity' in self.request_data.keys() or
+                  'credits' in self.request_data.keys())
+        )
+        # If there is a capacity, verify it fits the seats already taken.
+        if 'capacity' in self.request_data.keys():
+            self.verify_capacity(seats_taken=self.record.seats_taken)
+        # If there are credits, verify them.
+        if 'credits' in self.request_data.keys():
+            self.verify_credits()
         # If there are days, verify the days listed in days are allowed and
-        # join list as a comma separated string.
+        # convert the list to a bitmask.
         if 'days' in self.request_data.keys():
             self.verify_days()
-        # Conditional checks which time keys are in the reponse data, and
-        # uses database record times only one time is in the response data.
-        if ('start_time' in self.request_data.keys() and 'end_time' in
+        # Uses database record times for times not in the request data.
+        start_time = self.request_data.get(
+            'start_time', minutes_to_time(self.record.start_time)
+        )
+        end_time = self.request_data.get(
+            'end_time', minutes_to_time(self.record.end_time)
+        )
+        if ('start_time' in self.request_data.keys() or 'end_time' in
                 self.request_data.keys()):
             # Verify valid times.
-            self.verify_time([self.request_data['start_time'],
-                              self.request_data['end_time']])
+            self.verify_time([start_time, end_time])
             # Verify times are valid for scheduling
-            self.verify_course_times(self.request_data['start_time'],
-                                     self.request_data['end_time'])
-            # Verify no schedule conflicts.
-            self.verify_schedule_edit(self.request_data['start_time'],
-                                      self.request_data['end_time'])
-        elif ('start_time' in self.request_data.keys() and 'end_time' not in
+            self.verify_course_times(start_time, end_time)
+        # Verify no schedule conflicts when the schedule changes.
+        if ('days' in self.request_data.keys() or 'start_time' in
+                self.request_data.keys() or 'end_time' in
                 self.request_data.keys()):
-            # Verify valid times.
-            self.verify_time([self.request_data['start_time'],
-                              self.record.end_time])
-            # Verify times are valid for scheduling.
-            self.verify_course_times(self.request_data['start_time'],
-                                     self.record.end_time)
-            # Verify no schedule conflicts.
-            self.verify_schedule_edit(self.request_data['start_time'],
-                                      self.record.end_time)
-        elif ('start_time' not in self.request_data.keys() and 'end_time' in
-                self.request_data.keys()):
-            # Verify valid times.
-            self.verify_time([self.record.start_time,
-                              self.request_data['end_time']])
-            # Verify times are valid for scheduling.
-            self.verify_course_times(self.record.start_time,
-                                     self.request_data['end_time'])
-            # Verify no schedule conflicts.
-            self.verify_schedule_edit(self.record.start_time,
-                                      self.request_data['end_time'])
-
+            self.verify_schedule_edit(start_time, end_time)
+        # Convert times to minutes for the database.
+        self.convert_times()
+        # Reweight transcripts for new credits, once the edit is verified,
+        # so a rejected edit leaves no change pending.
+        if 'credits' in self.request_data.keys():
+            self.update_transcripts(self.course_transcript_changes(
+                self.record.uid, self.record.credits,
+                self.request_data['credits']
+            ))
+        # Fill any new seats from the waitlist, with every edit flushed, so
+        # waitlisted students are checked against the new schedule and the
+        # seats go to them in the same transaction as the edit.
+        if 'capacity' in self.request_data.keys():
+            for key, value in self.request_data.items():
+                setattr(self.record, key, value)
+            db.session.flush()
+            self.promote_waitlist(self.record.uid)
         # Build edits to course record and update it.
         self.edit_record()
         # Generate response.
@@ -534,10 +1007,20 @@ class Courses(Controller):
 
     # Deletes a course record.
     def delete_course(self):
-        self.delete_record()
+        self.run_transaction(self.remove_course)
         self.response_data.message = f'{SUCCESS.COURSE_DELETED} {self.uid}'
         self.generate_response()
 
+    # Deletes a course and removes its grades from transcripts as one
+    # transaction.
+    def remove_course(self):
+        self.record = self.get_record_by_id(lock=True)
+        self.update_transcripts(self.course_transcript_changes(
+            self.record.uid, self.record.credits, 0
+        ))
+        db.session.delete(self.record)
+        db.session.commit()
+
     """ COURSE VALIDATION HELPERS
     # ----------------------------------------------------------------------"""
     # Verify that days provided in the request data are valid, and
@@ -564,7 +1047,7 @@ class Courses(Controller):
                             STATUS_ERR.DUP_DAY,
                             422
                         )
-            self.request_data['days'] = ','.join(self.request_data['days'])
+            self.request_data['days'] = days_to_mask(self.request_data['days'])
         else:
             raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.DAY_LIST, 422)
 
@@ -584,6 +1067,50 @@ class Courses(Controller):
                 end_time > SCHEDULE.MAX_END):
             raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.INV_TIME, 422)
 
+    # Verify that a capacity is null or a positive integer, and that it
+    # is not less than the seats already taken.
+    def verify_capacity(self, seats_taken=0):
+        capacity = self.request_data['capacity']
+        if capacity is None:
+            return
+        if (type(capacity) is not int or capacity < 1):
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.BAD_CAPACITY,
+                              422)
+        if capacity < seats_taken:
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.CAPACITY_TAKEN,
+                              422)
+
+    # Gets an ETag for the course list from the number of courses, the
+    # highest uid and the sum of versions, read with one aggregate query.
+    # Uids are never reused, so inserts raise the highest uid, deletes
+    # lower the count and updates raise the sum, and any change to the
+    # catalog changes the ETag.
+    def catalog_etag(self):
+        count, last_uid, versions = db.session.query(
+            func.count(Course.uid), func.max(Course.uid),
+            func.sum(Course.version)
+        ).one()
+        return f'courses-{count}-{last_uid or 0}-{versions or 0}'
+
+    # Gets an ETag for a course from its uid and version.
+    def course_etag(self, version):
+        return f'course-{self.uid}-{version}'
+
+    # Verify that credits are a positive integer.
+    def verify_credits(self):
+        credits = self.request_data['credits']
+        if type(credits) is not int or credits < 1:
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.BAD_CREDITS,
+                              422)
+
+    # Converts validated time strings in the request data to minutes.
+    def convert_times(self):
+        for key in ['start_time', 'end_time']:
+            if key in self.request_data.keys():
+                self.request_data[key] = self.time_to_int(
+                    self.request_data[key]
+                )
+
     def verify_schedule_edit(self, new_start, new_end):
         # Create a course with new times to pass to schedule verifier.
         course = Course(
@@ -593,20 +1120,17 @@ class Courses(Controller):
                   if 'days' in self.request_data.keys()
                   else self.record.days)
         )
-        # Loop through course's enrollments.
-        for enrollment in self.record.enrollments:
-            # Pass each enrolled student's enrollments to schedule verifier
-            # to verify that course changes do not produce scheduling
-            # conflicts.
-            self.verify_schedule(course, enrollment.student.enrollments,
-                                 uid_check=False, exclude_uid=self.record.uid)
-        # Loop throuh course's assignments.
-        for assignment in self.record.assignments:
-            # Pass each enrolled instructors's assignments to schedule verifier
-            # to verify that course changes do not produce scheduling
-            # conflicts.
-            self.verify_schedule(course, assignment.instructor.assignments,
-                                 uid_check=False, exclude_uid=self.record.uid)
+        # Verify that course changes do not produce scheduling conflicts
+        # for enrolled students or assigned instructors, with one query
+        # for each.
+        for table, person_key in [(Enrollment, 'student_uid'),
+                                  (Assignment, 'instructor_uid')]:
+            persons = (
+                db.session.query(getattr(table, person_key))
+                .filter(table.course_uid == self.record.uid)
+            )
+            self.verify_schedule(course, table, person_key, persons,
+                                 exclude_uid=self.record.uid)
 
 
 # Controller class for the Assignment databale model.
@@ -625,21 +1149,30 @@ class Assignments(Controller):
         # Verify IDs are or can be converted to integers
         self.string_to_int(self.request_data['course_uid'])
         self.string_to_int(self.request_data['instructor_uid'])
+        # Check and insert the assignment as one transaction.
+        self.run_transaction(self.insert_assignment)
+        # Generate response.
+        self.response_data.message = SUCCESS.ASSIGNMENT_CREATED
+        self.generate_response()
+
+    # Checks and inserts an assignment while holding a lock on the
+    # instructor's row, so concurrent assignments for an instructor can't
+    # both pass the schedule check.
+    def insert_assignment(self):
         # Verify request data, then get records if they exist.
         if (self.request_data['course_uid'] and
                 self.request_data['instructor_uid'] > 0):
             course, instructor = self.get_course_and_person(
-                Instructor, 'instructor_uid'
+                Instructor, 'instructor_uid', lock=True
             )
         # Verify assignment isn't a duplicate and that there are no
         # schedule conflics.
-        self.verify_schedule(course=course, person=instructor.assignments)
-
-        # Create the Assignment record and insert it.
+        self.verify_schedule(course=course, table=Assignment,
+                             person_key='instructor_uid',
+                             persons=[instructor.uid])
+        # Create the Assignment record and insert it, the database rejects
+        # duplicates created since the check.
         self.create_record()
-        # Generate response.
-        self.response_data.message = SUCCESS.ASSIGNMENT_CREATED
-        self.generate_response()
 
     # Deletes an Assignment record.
     def delete_assignment(self):
@@ -664,23 +1197,619 @@ class Enrollments(Controller):
         # Verify IDs are or can be converted to integers
         self.string_to_int(self.request_data['course_uid'])
         self.string_to_int(self.request_data['student_uid'])
+        # Check and insert the enrollment as one transaction.
+        self.run_transaction(self.insert_enrollment)
+        # Generate response.
+        if self.response_data.waitlisted:
+            self.response_data.message = SUCCESS.WAITLISTED
+        else:
+            self.response_data.message = SUCCESS.ENROLLMENT_CREATED
+        self.generate_response()
+
+    # Checks and inserts an enrollment while holding a lock on the
+    # student's row, so concurrent enrollments for a student can't both
+    # pass the schedule check.
+    def insert_enrollment(self):
         # Verify request data, then get records if they exist.
         if (self.request_data['course_uid'] and
                 self.request_data['student_uid'] > 0):
             course, student = self.get_course_and_person(
-                Student, 'student_uid'
+                Student, 'student_uid', lock=True
             )
         # Verify enrollment isn't a duplicate and that there are no
         # schedule conflics.
-        self.verify_schedule(course=course, person=student.enrollments)
-        # Create the Assignment record and insert it.
+        self.verify_schedule(course=course, table=Enrollment,
+                             person_key='student_uid', persons=[student.uid])
+        # Take a seat, or add the student to the waitlist when the course
+        # is full.
+        self.response_data.waitlisted = not self.take_seat(course.uid)
+        if self.response_data.waitlisted:
+            self.table = Waitlist
+            self.create_record(message=STATUS_ERR.WAITLISTED)
+            self.response_data.waitlist_uid = self.record.uid
+            return
+        # Remove any waitlist entry the student has for the course, which
+        # the enrollment replaces.
+        (Waitlist.query
+         .filter(Waitlist.course_uid == course.uid,
+                 Waitlist.student_uid == student.uid)
+         .delete(synchronize_session=False))
+        # Create the Enrollment record and insert it, the database rejects
+        # duplicates created since the check.
         self.create_record()
+
+    # Creates enrollments in bulk. Returns the result of each enrollment in
+    # request order, so one invalid pair doesn't fail the others.
+    def create_enrollments_bulk(self):
+        # Verify the body is a list of enrollments of a valid size.
+        if type(self.request_data) != dict:
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.BULK_LIST, 422)
+        self.verify_request_data(['enrollments'], strict=True)
+        pairs = self.request_data['enrollments']
+        if type(pairs) is not list or len(pairs) < 1:
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.BULK_LIST, 422)
+        if len(pairs) > BULK.MAX_ENROLLMENTS:
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.BULK_SIZE, 422)
+        # Check and insert the enrollments as one transaction.
+        self.run_transaction(self.insert_enrollments_bulk)
         # Generate response.
-        self.response_data.message = SUCCESS.ENROLLMENT_CREATED
+        self.response_data.message = SUCCESS.ENROLLMENTS_PROCESSED
         self.generate_response()
 
-    # Deletes an Assignment record.
+    # Checks enrollments with a fixed number of set-based queries, then
+    # inserts the valid ones with one executemany per table. Students and
+    # courses are locked, so their schedules and seats can't change
+    # between the checks and the inserts.
+    def insert_enrollments_bulk(self):
+        results = [self.read_bulk_pair(pair)
+                   for pair in self.request_data['enrollments']]
+        pending = [result for result in results
+                   if 'description' not in result]
+        # Get the students and courses that exist, locking them.
+        students = {row.uid for row in self.select_in(
+            db.session.query(Student.uid), Student.uid,
+            {result['student_uid'] for result in pending}, lock=True
+        )}
+        courses = {row.uid: row for row in self.select_in(
+            db.session.query(Course.uid, Course.days, Course.start_time,
+                             Course.end_time, Course.capacity,
+                             Course.seats_taken),
+            Course.uid, {result['course_uid'] for result in pending},
+            lock=True
+        )}
+        # Get the schedules and waitlist entries of those students.
+        schedules = defaultdict(list)
+        for row in self.select_in(
+                db.session.query(Enrollment.student_uid, Course.uid,
+                                 Course.days, Course.start_time,
+                                 Course.end_time)
+                .join(Course, Enrollment.course_uid == Course.uid),
+                Enrollment.student_uid, students):
+            schedules[row.student_uid].append(row)
+        waiting = {(row.student_uid, row.course_uid) for row in self.select_in(
+            db.session.query(Waitlist.student_uid, Waitlist.course_uid),
+            Waitlist.student_uid, students
+        )}
+        seats = {uid: (None if course.capacity is None
+                       else course.capacity - course.seats_taken)
+                 for uid, course in courses.items()}
+        # Check each enrollment against the records and the enrollments
+        # accepted or waitlisted before it. Pairs that failed aren't seen,
+        # so a repeat is reported with its own error. As with a single
+        # enrollment, a waitlisted student is enrolled when a seat is free,
+        # and their waitlist entry removed.
+        enrollments, waitlist, taken, seen = [], [], Counter(), set()
+        promoted = []
+        for result in pending:
+            student_uid = result['student_uid']
+            course = courses.get(result['course_uid'])
+            pair = (student_uid, result['course_uid'])
+            if student_uid not in students or not course:
+                result['description'] = STATUS_ERR.NO_RECORD
+            elif pair in seen:
+                result['description'] = STATUS_ERR.BULK_DUPLICATE
+            elif any(row.uid == course.uid
+                     for row in schedules[student_uid]):
+                result['description'] = STATUS_ERR.DUPLICATE
+            elif any(schedules_overlap(row, course)
+                     for row in schedules[student_uid]):
+                result['description'] = STATUS_ERR.CONFLICT
+            elif (seats[course.uid] is not None and seats[course.uid] < 1 and
+                    pair in waiting):
+                result['description'] = STATUS_ERR.WAITLISTED
+            elif seats[course.uid] is not None and seats[course.uid] < 1:
+                waitlist.append({'course_uid': course.uid,
+                                 'student_uid': student_uid})
+                result['waitlisted'] = True
+                seen.add(pair)
+            else:
+                if seats[course.uid] is not None:
+                    seats[course.uid] -= 1
+                enrollments.append({'course_uid': course.uid,
+                                    'student_uid': student_uid})
+                taken[course.uid] += 1
+                schedules[student_uid].append(course)
+                result['waitlisted'] = False
+                seen.add(pair)
+                if pair in waiting:
+                    promoted.append({'course': course.uid,
+                                     'student': student_uid})
+        # Insert the enrollments and waitlist entries, and count the seats
+        # they take.
+        if enrollments:
+            db.session.execute(Enrollment.__table__.insert(), enrollments)
+            db.session.execute(
+                Course.__table__.update()
+                .where(Course.uid == bindparam('course'))
+                .values(seats_taken=Course.seats_taken + bindparam('taken')),
+                [{'course': uid, 'taken': count}
+                 for uid, count in taken.items()]
+            )
+        if waitlist:
+            db.session.execute(Waitlist.__table__.insert(), waitlist)
+        if promoted:
+            db.session.execute(
+                Waitlist.__table__.delete()
+                .where(Waitlist.course_uid == bindparam('course'))
+                .where(Waitlist.student_uid == bindparam('student')),
+                promoted
+            )
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.DUPLICATE, 422)
+        # Add results to the response.
+        for result in results:
+            result['success'] = 'description' not in result
+            if result['success']:
+                result['message'] = (SUCCESS.WAITLISTED if result['waitlisted']
+                                     else SUCCESS.ENROLLMENT_CREATED)
+        self.response_data.enrollments = results
+        self.response_data.created = len(enrollments)
+        self.response_data.waitlisted = len(waitlist)
+        self.response_data.failed = len(results) - len(enrollments) - len(
+            waitlist)
+
+    # Reads a pair of uids from a bulk enrollment request into a result,
+    # with a description of the error if the pair is invalid.
+    def read_bulk_pair(self, pair):
+        if type(pair) is not dict:
+            return {'description': STATUS_ERR.BULK_LIST}
+        result = {key: pair.get(key) for key in self.valid_keys}
+        if any(key not in pair.keys() for key in self.valid_keys):
+            result['description'] = STATUS_ERR.MISSING_KEY
+        elif any(key not in self.valid_keys for key in pair.keys()):
+            result['description'] = STATUS_ERR.BAD_KEY
+        else:
+            try:
+                for key in self.valid_keys:
+                    result[key] = int(str(pair[key]))
+            except ValueError:
+                result['description'] = STATUS_ERR.BAD_ID
+        return result
+
+    # Deletes an Enrollment record, releasing its seat to the waitlist.
     def delete_enrollment(self):
-        self.delete_record()
+        self.run_transaction(self.remove_enrollment)
         self.response_data.message = f'{SUCCESS.ENROLLMENT_DELETED} {self.uid}'
         self.generate_response()
+
+    # Deletes an enrollment and fills its seat as one transaction.
+    def remove_enrollment(self):
+        self.record = self.get_record_by_id(lock=True)
+        db.session.delete(self.record)
+        self.release_seat(self.record.course_uid)
+        db.session.commit()
+
+    # Deletes a Waitlist record.
+    def delete_waitlist(self):
+        self.record = self.get_record_by_id(table=Waitlist, uid=self.uid)
+        self.record.delete()
+        self.response_data.message = f'{SUCCESS.WAITLIST_DELETED} {self.uid}'
+        self.generate_response()
+
+
+# Controller class for the Grade databale model.
+# -----------------------------------------------------------------------------
+class Grades(Controller):
+    # Init self with super.
+    def __init__(self, **kwargs):
+        super().__init__(table=Grade, **kwargs)
+        # Set valid keys for posting a course's grades, and for each grade.
+        self.valid_keys = ['course_uid', 'grades']
+        self.grade_keys = ['student_uid', 'grade']
+
+    """ ROUTE HANDLERS
+    # ----------------------------------------------------------------------"""
+    # Posts a course's grades in one transaction, creating new grades and
+    # updating existing ones. If any grade is invalid, no grades are
+    # posted and an error is returned for each invalid grade.
+    def post_grades(self):
+        # Verify required keys exist in body of JSON request.
+        self.verify_request_data(self.valid_keys, strict=True)
+        # Verify the course uid is an integer and grades are a list.
+        self.request_data['course_uid'] = self.string_to_int(
+            self.request_data['course_uid']
+        )
+        grades = self.request_data['grades']
+        if (type(grades) is not list or len(grades) < 1 or
+                len(grades) > BULK.MAX_ENROLLMENTS):
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.GRADE_LIST, 422)
+        # Check and post the grades as one transaction.
+        self.run_transaction(self.upsert_grades)
+        # Generate response.
+        self.response_data.message = SUCCESS.GRADES_POSTED
+        self.generate_response()
+
+    # Updates a grade record.
+    def edit_grade(self):
+        # Verify the grade is the only key and is valid.
+        self.verify_request_data(['grade'], strict=True)
+        self.request_data['grade'] = self.verify_grade(
+            self.request_data['grade']
+        )
+        # Update the grade and the transcript as one transaction.
+        self.run_transaction(self.update_grade)
+        # Generate response.
+        self.response_data.message = f'{SUCCESS.GRADE_EDITED} {self.uid}'
+        self.generate_response()
+
+    # Updates a grade, and replaces its points in the transcript.
+    def update_grade(self):
+        course = self.get_grade_and_course()
+        self.update_transcripts([(
+            self.record.student_uid, 0,
+            quality_points(self.request_data['grade'], course.credits) -
+            quality_points(self.record.grade, course.credits)
+        )])
+        self.edit_record()
+
+    # Deletes a grade record.
+    def delete_grade(self):
+        self.run_transaction(self.remove_grade)
+        self.response_data.message = f'{SUCCESS.GRADE_DELETED} {self.uid}'
+        self.generate_response()
+
+    # Deletes a grade, and removes it from the transcript.
+    def remove_grade(self):
+        course = self.get_grade_and_course()
+        self.update_transcripts([(
+            self.record.student_uid, -course.credits,
+            -quality_points(self.record.grade, course.credits)
+        )])
+        self.record.delete()
+
+    # Gets a student's transcript, with the grade point average read from
+    # the student's running totals.
+    def get_transcript(self):
+        student = self.get_record_by_id(
+            table=Student, uid=self.uid,
+            options=(joinedload(Student.transcript),)
+        )
+        transcript = student.transcript or Transcript(credits=0, points=0)
+        grades = (
+            db.session.query(Grade.grade, Course.uid, Course.title,
+                             Course.credits)
+            .join(Course, Grade.course_uid == Course.uid)
+            .filter(Grade.student_uid == student.uid)
+            .order_by(Course.uid)
+        )
+        self.response_data.transcript = {
+            **student.short(),
+            'courses': [{
+                'uid': grade.uid,
+                'title': grade.title,
+                'credits': grade.credits,
+                'grade': grade.grade
+            } for grade in grades],
+            'credits': transcript.credits,
+            'gpa': transcript.gpa()
+        }
+        self.generate_response()
+
+    # Recomputes every student's transcript totals from their grades, a
+    # chunk of students at a time. Each chunk's totals are summed with one
+    # grouped query, written with one executemany and committed. Returns
+    # the number of students recomputed.
+    def recompute_transcripts(self):
+        points = case([(Grade.grade == grade, round(value * 10))
+                       for grade, value in GRADES.POINTS.items()], else_=0)
+        last_uid, students = 0, 0
+        while True:
+            uids = [row.uid for row in db.session.query(Student.uid)
+                    .filter(Student.uid > last_uid).order_by(Student.uid)
+                    .limit(GRADES.CHUNK_SIZE)]
+            if not uids:
+                return students
+            totals = dict.fromkeys(uids, (0, 0))
+            totals.update({row.student_uid: (row.credits, row.points)
+                           for row in (
+                db.session.query(
+                    Grade.student_uid,
+                    func.sum(Course.credits).label('credits'),
+                    func.sum(Course.credits * points).label('points'))
+                .join(Course, Grade.course_uid == Course.uid)
+                .filter(Grade.student_uid.between(uids[0], uids[-1]))
+                .group_by(Grade.student_uid)
+            )})
+            db.session.execute(text(
+                'INSERT INTO transcript (student_uid, credits, points) '
+                'VALUES (:student_uid, :credits, :points) '
+                'ON CONFLICT (student_uid) DO UPDATE SET '
+                'credits = excluded.credits, points = excluded.points'
+            ), [{'student_uid': uid, 'credits': credits, 'points': points}
+                for uid, (credits, points) in totals.items()])
+            db.session.commit()
+            last_uid, students = uids[-1], students + len(uids)
+
+    # Gets a student's grades, with the course of each grade, in one
+    # query.
+    def get_student_grades(self):
+        student = self.get_record_by_id(table=Student, uid=self.uid)
+        grades = (
+            db.session.query(Grade.uid, Grade.grade, Course.uid.label(
+                'course_uid'), Course.title)
+            .join(Course, Grade.course_uid == Course.uid)
+            .filter(Grade.student_uid == student.uid)
+            .order_by(Course.uid)
+        )
+        self.response_data.student = {
+            **student.short(),
+            'grades': [{
+                'uid': grade.uid,
+                'course_uid': grade.course_uid,
+                'title': grade.title,
+                'grade': grade.grade
+            } for grade in grades]
+        }
+        self.generate_response()
+
+    # Gets a course's grades, with the grade distribution counted by the
+    # database. The average is weighted from the distribution.
+    def get_course_grades(self):
+        course = self.get_record_by_id(table=Course, uid=self.uid)
+        grades = (
+            db.session.query(Grade.uid, Grade.grade, Student.uid.label(
+                'student_uid'), Student.name)
+            .join(Student, Grade.student_uid == Student.uid)
+            .filter(Grade.course_uid == course.uid)
+            .order_by(Student.uid)
+        )
+        counts = dict(
+            db.session.query(Grade.grade, func.count(Grade.uid))
+            .filter(Grade.course_uid == course.uid)
+            .group_by(Grade.grade)
+        )
+        distribution = {grade: counts.get(grade, 0)
+                        for grade in GRADES.POINTS.keys()}
+        graded = sum(distribution.values())
+        self.response_data.course = {
+            **course.short(),
+            'grades': [{
+                'uid': grade.uid,
+                'student_uid': grade.student_uid,
+                'name': grade.name,
+                'grade': grade.grade
+            } for grade in grades],
+            'distribution': distribution,
+            'average points': (round(sum(
+                GRADES.POINTS[grade] * count
+                for grade, count in distribution.items()) / graded, 2)
+                if graded else None)
+        }
+        self.generate_response()
+
+    """ GRADE HELPERS
+    # ----------------------------------------------------------------------"""
+    # Gets the grade record to change, and returns its course. The course
+    # is locked first, as grade posts and credit edits lock it, and then
+    # the grade, so the transcript change matches the grade and credits
+    # it replaces.
+    def get_grade_and_course(self):
+        course_uid = (db.session.query(Grade.course_uid)
+                      .filter(Grade.uid == self.uid).scalar())
+        if course_uid is None:
+            raise StatusError(STATUS_ERR.CODE_404, STATUS_ERR.NO_RECORD, 404)
+        course = self.get_record_by_id(table=Course, uid=course_uid,
+                                       lock=True)
+        self.record = self.get_record_by_id(lock=True)
+        return course
+
+    # Checks grades with set-based queries, then inserts new grades and
+    # updates changed grades with one executemany each. The course is
+    # locked so its grades are posted one request at a time.
+    def upsert_grades(self):
+        course = self.get_record_by_id(
+            table=Course, uid=self.request_data['course_uid'], lock=True
+        )
+        grades = [self.read_grade(grade)
+                  for grade in self.request_data['grades']]
+        # Verify each student is enrolled, and graded once.
+        enrolled = {row.student_uid for row in self.select_in(
+            db.session.query(Enrollment.student_uid)
+            .filter(Enrollment.course_uid == course.uid),
+            Enrollment.student_uid,
+            {grade['student_uid'] for grade in grades
+             if 'description' not in grade}
+        )}
+        students = set()
+        for grade in grades:
+            if 'description' in grade:
+                continue
+            if grade['student_uid'] in students:
+                grade['description'] = STATUS_ERR.GRADE_DUPLICATE
+            elif grade['student_uid'] not in enrolled:
+                grade['description'] = STATUS_ERR.NOT_ENROLLED
+            students.add(grade['student_uid'])
+        errors = [grade for grade in grades if 'description' in grade]
+        if errors:
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.GRADE_ERRORS,
+                              422, errors=errors)
+        # Split grades into new and changed grades.
+        existing = {row.student_uid: row for row in self.select_in(
+            db.session.query(Grade.uid, Grade.student_uid, Grade.grade)
+            .filter(Grade.course_uid == course.uid),
+            Grade.student_uid, students
+        )}
+        new, changed, transcripts = [], [], []
+        for grade in grades:
+            row = existing.get(grade['student_uid'])
+            points = quality_points(grade['grade'], course.credits)
+            if not row:
+                new.append({'course_uid': course.uid, **grade})
+                transcripts.append((grade['student_uid'], course.credits,
+                                    points))
+            elif row.grade != grade['grade']:
+                changed.append({'grade_uid': row.uid,
+                                'new_grade': grade['grade']})
+                transcripts.append((
+                    grade['student_uid'], 0,
+                    points - quality_points(row.grade, course.credits)
+                ))
+        if new:
+            db.session.execute(Grade.__table__.insert(), new)
+        if changed:
+            db.session.execute(
+                Grade.__table__.update()
+                .where(Grade.uid == bindparam('grade_uid'))
+                .values(grade=bindparam('new_grade')),
+                changed
+            )
+        self.update_transcripts(transcripts)
+        db.session.commit()
+        self.response_data.created = len(new)
+        self.response_data.updated = len(changed)
+
+    # Reads a grade from the request, with a description of the error if
+    # the grade is invalid.
+    def read_grade(self, grade):
+        if type(grade) is not dict:
+            return {'description': STATUS_ERR.GRADE_LIST}
+        result = {key: grade.get(key) for key in self.grade_keys}
+        if any(key not in grade.keys() for key in self.grade_keys):
+            result['description'] = STATUS_ERR.MISSING_KEY
+        elif any(key not in self.grade_keys for key in grade.keys()):
+            result['description'] = STATUS_ERR.BAD_KEY
+        else:
+            try:
+                result['student_uid'] = int(str(grade['student_uid']))
+                result['grade'] = self.verify_grade(grade['grade'])
+            except ValueError:
+                result['description'] = STATUS_ERR.BAD_ID
+            except StatusError as error:
+                result['description'] = error.description
+        return result
+
+    # Verify that a grade is an allowed grade, returning it in upper case.
+    def verify_grade(self, grade):
+        if type(grade) is str and grade.strip().upper() in GRADES.POINTS:
+            return grade.strip().upper()
+        raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.BAD_GRADE, 422)
+
+
+# Controller class for exports of the database models.
+# -----------------------------------------------------------------------------
+class Exports(Controller):
+    # Init self with super.
+    def __init__(self, entity=None, file_format=None, **kwargs):
+        super().__init__(**kwargs)
+        self.entity = entity
+        self.file_format = file_format
+        # Verify the entity and format can be exported.
+        if (entity not in EXPORT.PERMISSIONS.keys() or
+                file_format not in EXPORT.FORMATS):
+            raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.BAD_EXPORT, 422)
+
+    """ ROUTE HANDLERS
+    # ----------------------------------------------------------------------"""
+    # Streams every row of the entity as NDJSON or CSV. Rows are fetched in
+    # batches from a server-side cursor and sent as each batch is written,
+    # so exports of any size use constant memory and start immediately.
+    def export_records(self):
+        query, fields, to_row = getattr(self, f'{self.entity}_export')()
+        rows = query.yield_per(EXPORT.BATCH_SIZE)
+        write = (self.write_csv if self.file_format == 'csv'
+                 else self.write_ndjson)
+        self.response = Response(
+            stream_with_context(write(rows, fields, to_row)),
+            mimetype=EXPORT.CONTENT_TYPES[self.file_format],
+            headers={'Content-Disposition': (
+                f'attachment; filename={self.entity}.{self.file_format}'
+            )}
+        )
+
+    """ EXPORT WRITERS
+    # ----------------------------------------------------------------------"""
+    # Writes rows as JSON objects, one to a line.
+    def write_ndjson(self, rows, fields, to_row):
+        batch = []
+        for row in rows:
+            batch.append(json.dumps(dict(zip(fields, to_row(row)))) + '\n')
+            if len(batch) == EXPORT.BATCH_SIZE:
+                yield ''.join(batch)
+                batch = []
+        if batch:
+            yield ''.join(batch)
+
+    # Writes rows as CSV, after a header row.
+    def write_csv(self, rows, fields, to_row):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        for number, row in enumerate(rows, start=1):
+            writer.writerow(to_row(row))
+            if number % EXPORT.BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    """ EXPORT QUERIES
+    # ----------------------------------------------------------------------"""
+    # Each returns a query of plain columns ordered by uid, the export's
+    # field names and a function that formats a result as a row.
+    def students_export(self):
+        query = (db.session.query(Student.uid, Student.name, Student.email,
+                                  Student.phone)
+                 .order_by(Student.uid))
+        return query, ['uid', 'name', 'email', 'phone'], tuple
+
+    def instructors_export(self):
+        query = (db.session.query(Instructor.uid, Instructor.name,
+                                  Instructor.email, Instructor.phone,
+                                  Instructor.bio)
+                 .order_by(Instructor.uid))
+        return query, ['uid', 'name', 'email', 'phone', 'bio'], tuple
+
+    def courses_export(self):
+        query = (db.session.query(Course.uid, Course.title, Course.days,
+                                  Course.start_time, Course.end_time,
+                                  Course.description, Course.capacity,
+                                  Course.seats_taken)
+                 .order_by(Course.uid))
+        fields = ['uid', 'title', 'days', 'start time', 'end time',
+                  'description', 'capacity', 'seats taken']
+
+        def to_row(row):
+            return (row.uid, row.title, ','.join(mask_to_days(row.days)),
+                    minutes_to_time(row.start_time),
+                    minutes_to_time(row.end_time), row.description,
+                    row.capacity, row.seats_taken)
+        return query, fields, to_row
+
+    # Rosters have a row for each enrollment, with course and student
+    # details.
+    def rosters_export(self):
+        query = (db.session.query(Enrollment.uid, Course.uid, Course.title,
+                                  Student.uid, Student.name, Student.email)
+                 .join(Course, Enrollment.course_uid == Course.uid)
+                 .join(Student, Enrollment.student_uid == Student.uid)
+                 .order_by(Course.uid, Enrollment.uid))
+        fields = ['enrollment_uid', 'course_uid', 'course_title',
+                  'student_uid', 'student_name', 'student_email']
+        return query, fields, tuple
@@ -3,8 +3,14 @@
 # --------------------------------------------------------------------------"""
 
 
+# Third party dependencies
+from sqlalchemy import event, literal_column
+from sqlalchemy.orm import Session
+
 # Local applicaiton dependencies
-from config.config import db
+from config.config import db, GRADES
+from helpers.helpers import (days_to_mask, mask_to_days, time_to_minutes,
+                             minutes_to_time)
 
 
 """ --------------------------------------------------------------------------#
@@ -41,9 +47,16 @@ class Student(BaseModel, db.Model):
     name = db.Column(db.String(120), nullable=False)
     email = db.Column(db.String(120), nullable=False, unique=True)
     phone = db.Column(db.String(120), nullable=False)
+    # Columns of truncated details, which short listings select alone.
+    SHORT_COLUMNS = ('uid', 'name')
     # Relationships
     enrollments = db.relationship('Enrollment', back_populates='student',
                                   cascade='all,delete,delete-orphan')
+    waitlist = db.relationship('Waitlist', back_populates='student',
+                               cascade='all,delete,delete-orphan')
+    transcript = db.relationship('Transcript', back_populates='student',
+                                 uselist=False,
+                                 cascade='all,delete,delete-orphan')
     grades = db.relationship('Grade', back_populates='student',
                              cascade='all,delete,delete-orphan')
 
@@ -64,10 +77,8 @@ class Student(BaseModel, db.Model):
 
     # Return truncated details.
     def short(self):
-        return {
-            'uid': self.uid,
-            'name': self.name
-        }
+        return {column: getattr(self, column)
+                for column in self.SHORT_COLUMNS}
 
     # Return full details with enrollments.
     def with_enrollments(self):
@@ -79,9 +90,9 @@ class Student(BaseModel, db.Model):
             'enrollments': [{
                 'uid': enrollment.uid,
                 'title': enrollment.course.title,
-                'days': enrollment.course.days,
-                'start_time': enrollment.course.start_time,
-                'end_time': enrollment.course.end_time
+                'days': ','.join(mask_to_days(enrollment.course.days)),
+                'start_time': minutes_to_time(enrollment.course.start_time),
+                'end_time': minutes_to_time(enrollment.course.end_time)
             } for enrollment in self.enrollments]
         }
 
@@ -100,12 +111,12 @@ class Instructor(BaseModel, db.Model):
     email = db.Column(db.String(120), nullable=False, unique=True)
     phone = db.Column(db.String(129), nullable=False)
     bio = db.Column(db.String(1000), nullable=False)
+    # Columns of truncated details, which short listings select alone.
+    SHORT_COLUMNS = ('uid', 'name', 'bio')
 
     # Relationships
     assignments = db.relationship('Assignment', back_populates='instructor',
                                   cascade='all,delete,delete-orphan')
-    grades = db.relationship('Grade', back_populates='instructor',
-                             cascade='all,delete,delete-orphan')
 
     # Methods
     def __init__(self, name=None, email=None, phone=None, bio=None):
@@ -126,11 +137,8 @@ class Instructor(BaseModel, db.Model):
 
     # Return truncated details.
     def short(self):
-        return {
-            'uid': self.uid,
-            'name': self.name,
-            'bio': self.bio
-        }
+        return {column: getattr(self, column)
+                for column in self.SHORT_COLUMNS}
 
     # Return full details with assignments.
     def with_assignments(self):
@@ -143,9 +151,9 @@ class Instructor(BaseModel, db.Model):
             'assignments': [{
                 'uid': assignment.uid,
                 'title': assignment.course.title,
-                'days': assignment.course.days,
-                'start_time': assignment.course.start_time,
-                'end_time': assignment.course.end_time
+                'days': ','.join(mask_to_days(assignment.course.days)),
+                'start_time': minutes_to_time(assignment.course.start_time),
+                'end_time': minutes_to_time(assignment.course.end_time)
             } for assignment in self.assignments]
         }
 
@@ -154,33 +162,72 @@ class Instructor(BaseModel, db.Model):
 # ------------------------------------------------------------------------
 class Course(BaseModel, db.Model):
     __tablename__ = 'course'
+    # Uids are never reused, as on Postgres, so the catalog ETag's highest
+    # uid changes whenever a course is created.
+    __table_args__ = {'sqlite_autoincrement': True}
 
     # Autoincrementing, unique primary key
     uid = db.Column(db.Integer(), primary_key=True)
 
-    # Course data
+    # Course data. Days are a bitmask of SCHEDULE.WEEK_DAYS and times are
+    # minutes after midnight, so schedules compare with integer operations.
     title = db.Column(db.String(120), nullable=False)
-    days = db.Column(db.String(240), nullable=False)
-    start_time = db.Column(db.String(120), nullable=False)
-    end_time = db.Column(db.String(120), nullable=False)
+    days = db.Column(db.Integer(), nullable=False)
+    start_time = db.Column(db.Integer(), nullable=False)
+    end_time = db.Column(db.Integer(), nullable=False)
     description = db.Column(db.String(1000), nullable=False)
+    # Seat data. A course without a capacity has unlimited seats. Seats
+    # taken counts enrollments, and is kept by the enrollment controller
+    # so seat checks never count enrollment rows.
+    capacity = db.Column(db.Integer())
+    seats_taken = db.Column(db.Integer(), nullable=False, default=0,
+                            server_default='0')
+    # Credits weight the course's grades in grade point averages.
+    credits = db.Column(db.Integer(), nullable=False,
+                        default=GRADES.DEFAULT_CREDITS,
+                        server_default=str(GRADES.DEFAULT_CREDITS))
+    # Version is incremented by every update, including core updates of
+    # seats, so catalog ETags change whenever a course does.
+    version = db.Column(db.Integer(), nullable=False, default=1,
+                        server_default='1',
+                        onupdate=literal_column('version + 1'))
+    # Columns of truncated details, which short listings select alone.
+    SHORT_COLUMNS = ('uid', 'title')
 
     # Relationships
     assignments = db.relationship('Assignment', back_populates='course',
                                   cascade='all,delete,delete-orphan')
     enrollments = db.relationship('Enrollment', back_populates='course',
                                   cascade='all,delete,delete-orphan')
+    waitlist = db.relationship('Waitlist', back_populates='course',
+                               cascade='all,delete,delete-orphan')
+    grades = db.relationship('Grade', back_populates='course',
+                             cascade='all,delete,delete-orphan')
     # enrollments = db.relationship('Enrollment', back_populates='student',
     #                               lazy=True)
 
     # Methods
-    def __init__(self, title=None, days=None,
-                 start_time=None, end_time=None, description=None):
+    def __init__(self, title=None, days=None, start_time=None,
+                 end_time=None, description=None, capacity=None,
+                 credits=GRADES.DEFAULT_CREDITS):
         self.title = title
-        self.days = days
-        self.start_time = start_time
-        self.end_time = end_time
+        self.days = days_to_mask(days) if days is not None else None
+        self.start_time = (time_to_minutes(start_time)
+                           if start_time is not None else None)
+        self.end_time = (time_to_minutes(end_time)
+                         if end_time is not None else None)
         self.description = description
+        self.capacity = capacity
+        self.seats_taken = 0
+        self.credits = credits
+
+    # Return schedule details as day names and HH:MM times.
+    def schedule(self):
+        return {
+            'days': mask_to_days(self.days),
+            'start time': minutes_to_time(self.start_time),
+            'end time': minutes_to_time(self.end_time)
+        }
 
     # Return full details
     def full(self):
@@ -191,21 +238,17 @@ class Course(BaseModel, db.Model):
                 'uid': assignment.instructor.uid,
                 'name': assignment.instructor.name,
             } for assignment in self.assignments],
-            'days': (
-                [day.capitalize() for day in self.days.split(',')]
-                if type(self.days) != list else self.days
-                ),
-            'start time': self.start_time,
-            'end time': self.end_time,
-            'description': self.description
+            **self.schedule(),
+            'description': self.description,
+            'capacity': self.capacity,
+            'seats taken': self.seats_taken,
+            'credits': self.credits
         }
 
     # Return truncated details.
     def short(self):
-        return {
-            'uid': self.uid,
-            'title': self.title
-        }
+        return {column: getattr(self, column)
+                for column in self.SHORT_COLUMNS}
 
     def with_students(self):
         return {
@@ -218,12 +261,7 @@ class Course(BaseModel, db.Model):
                 'phone': enrollment.student.phone,
                 'enrollment_uid': enrollment.uid
             } for enrollment in self.enrollments],
-            'days': (
-                [day.capitalize() for day in self.days.split(',')]
-                if type(self.days) != list else self.days
-                ),
-            'start time': self.start_time,
-            'end time': self.end_time,
+            **self.schedule(),
             'description': self.description
         }
 
@@ -238,12 +276,7 @@ class Course(BaseModel, db.Model):
                 'phone': assignment.instructor.phone,
                 'assignment_uid': assignment.uid
             } for assignment in self.assignments],
-            'days': (
-                [day.capitalize() for day in self.days.split(',')]
-                if type(self.days) != list else self.days
-                ),
-            'start time': self.start_time,
-            'end time': self.end_time,
+            **self.schedule(),
             'description': self.description
         }
 
@@ -253,13 +286,19 @@ class Course(BaseModel, db.Model):
 class Assignment (BaseModel, db.Model):
     # Main model
     __tablename__ = 'assignment'
+    # An instructor can only be assigned to a course once. The unique
+    # index also serves lookups by course.
+    __table_args__ = (
+        db.UniqueConstraint('course_uid', 'instructor_uid',
+                            name='uq_assignment_course_uid_instructor_uid'),
+    )
     # Autoincrementing, unique primary key
     uid = db.Column(db.Integer, primary_key=True)
     # Assignment data
     course_uid = db.Column(db.Integer, db.ForeignKey('course.uid',),
                            nullable=False)
     instructor_uid = db.Column(db.Integer, db.ForeignKey('instructor.uid'),
-                               nullable=False)
+                               nullable=False, index=True)
 
     # Relationship
     course = db.relationship('Course', back_populates='assignments', lazy=True)
@@ -272,13 +311,19 @@ class Assignment (BaseModel, db.Model):
 class Enrollment(BaseModel, db.Model):
     # Main model
     __tablename__ = 'enrollment'
+    # A student can only be enrolled in a course once. The unique index
+    # also serves lookups by course.
+    __table_args__ = (
+        db.UniqueConstraint('course_uid', 'student_uid',
+                            name='uq_enrollment_course_uid_student_uid'),
+    )
     # Autoincrementing, unique primary key
     uid = db.Column(db.Integer, primary_key=True)
     # Enrollment data
     course_uid = db.Column(db.Integer, db.ForeignKey('course.uid'),
                            nullable=False)
     student_uid = db.Column(db.Integer, db.ForeignKey('student.uid'),
-                            nullable=False)
+                            nullable=False, index=True)
 
     # Relationships
     course = db.relationship('Course', back_populates='enrollments', lazy=True)
@@ -286,16 +331,110 @@ class Enrollment(BaseModel, db.Model):
                               lazy=True)
 
 
-# Enrollment model - Registers a student for a course.
+# Waitlist model - Queues a student for a full course. Students are
+# enrolled in uid order as seats become available.
+# ------------------------------------------------------------------------
+class Waitlist(BaseModel, db.Model):
+    # Main model
+    __tablename__ = 'waitlist'
+    # A student can only wait for a course once. The unique index also
+    # serves lookups by course.
+    __table_args__ = (
+        db.UniqueConstraint('course_uid', 'student_uid',
+                            name='uq_waitlist_course_uid_student_uid'),
+    )
+    # Autoincrementing, unique primary key
+    uid = db.Column(db.Integer, primary_key=True)
+    # Waitlist data
+    course_uid = db.Column(db.Integer, db.ForeignKey('course.uid'),
+                           nullable=False)
+    student_uid = db.Column(db.Integer, db.ForeignKey('student.uid'),
+                            nullable=False, index=True)
+
+    # Relationships
+    course = db.relationship('Course', back_populates='waitlist', lazy=True)
+    student = db.relationship('Student', back_populates='waitlist',
+                              lazy=True)
+
+
+# Grade model - Records a student's grade for a course.
 # ------------------------------------------------------------------------
 class Grade(BaseModel, db.Model):
     # Main model
     __tablename__ = 'grade'
+    # A student has one grade for a course. The unique index also serves
+    # lookups by course.
+    __table_args__ = (
+        db.UniqueConstraint('course_uid', 'student_uid',
+                            name='uq_grade_course_uid_student_uid'),
+    )
     # Autoincrementing, unique primary key
     uid = db.Column(db.Integer, primary_key=True)
     # Grade data
     student_uid = db.Column(db.Integer, db.ForeignKey('student.uid'),
-                            nullable=False)
+                            nullable=False, index=True)
     course_uid = db.Column(db.Integer, db.ForeignKey('course.uid'),
                            nullable=False)
     grade = db.Column(db.String(120), nullable=False)
+
+    # Relationships
+    course = db.relationship('Course', back_populates='grades', lazy=True)
+    student = db.relationship('Student', back_populates='grades', lazy=True)
+
+
+# Transcript model - Keeps a student's running grade totals, so grade point
+# averages are read without scanning grades. Totals are updated with each
+# grade change, and can be recomputed from grades.
+# ------------------------------------------------------------------------
+class Transcript(BaseModel, db.Model):
+    # Main model
+    __tablename__ = 'transcript'
+    # The student is the primary key, a student has one transcript.
+    student_uid = db.Column(db.Integer, db.ForeignKey('student.uid'),
+                            primary_key=True, autoincrement=False)
+    # Transcript data. Credits are the graded credits, and points are the
+    # credit-weighted grade points in tenths, so sums stay exact integers.
+    credits = db.Column(db.Integer, nullable=False, default=0)
+    points = db.Column(db.Integer, nullable=False, default=0)
+
+    # Relationships
+    student = db.relationship('Student', back_populates='transcript',
+                              lazy=True)
+
+    # Return the grade point average, or None without graded credits.
+    def gpa(self):
+        if not self.credits:
+            return None
+        return round(self.points / 10 / self.credits, 2)
+
+
+""" --------------------------------------------------------------------------#
+# MODEL EVENTS
+# --------------------------------------------------------------------------"""
+
+
+# Courses show their instructors, so adding or removing an assignment, or
+# editing an instructor, changes the course without updating its row.
+# Increments those courses' versions in the same flush, so their ETags
+# change too.
+@event.listens_for(Session, 'before_flush')
+def bump_course_versions(session, flush_context, instances):
+    course_uids = {
+        assignment.course_uid
+        for assignment in [*session.new, *session.deleted]
+        if isinstance(assignment, Assignment) and assignment.course_uid
+    }
+    instructor_uids = [
+        instructor.uid for instructor in session.dirty
+        if isinstance(instructor, Instructor) and
+        session.is_modified(instructor, include_collections=False)
+    ]
+    if instructor_uids:
+        course_uids.update(
+            row.course_uid for row in session.query(Assignment.course_uid)
+            .filter(Assignment.instructor_uid.in_(instructor_uids))
+        )
+    if course_uids:
+        session.query(Course).filter(Course.uid.in_(course_uids)).update(
+            {Course.version: Course.version + 1}, synchronize_session=False
+        )
@@ -7,6 +7,7 @@
 from types import SimpleNamespace
 
 # Local application dependencies
+from config.config import db
 from database.models import Assignment
 
 
@@ -91,7 +92,7 @@ class AssignmentTest:
             }
         )
 
-    # Inserts seed data into database.
+    # Inserts seed data into database with one commit.
     def create_records(self):
-        for course in self.seeds:
-            course.insert()
+        db.session.add_all(self.seeds)
+        db.session.commit()
@@ -7,6 +7,7 @@
 from types import SimpleNamespace
 
 # Local application dependencies
+from config.config import db
 from database.models import Course
 
 
@@ -170,6 +171,13 @@ class CourseTest:
                 "description": "There's a science to it."
             },
             conflict_time={
+                "start_time": "12:30",
+                "end_time": "13:00",
+                "days": [
+                    "Tuesday"
+                ]
+            },
+            no_conflict_time={
                 "start_time": "12:30",
                 "end_time": "13:00",
                 "days": [
@@ -178,7 +186,7 @@ class CourseTest:
             }
         )
 
-    # Inserts seed data into database.
+    # Inserts seed data into database with one commit.
     def create_records(self):
-        for course in self.seeds:
-            course.insert()
+        db.session.add_all(self.seeds)
+        db.session.commit()
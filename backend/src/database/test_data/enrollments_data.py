@@ -7,6 +7,7 @@
 from types import SimpleNamespace
 
 # Local application dependencies
+from config.config import db
 from database.models import Enrollment
 
 
@@ -91,7 +92,11 @@ class EnrollmentTest:
             }
         )
 
-    # Inserts seed data into database.
+    # Inserts seed data into database with one commit.
     def create_records(self):
-        for course in self.seeds:
-            course.insert()
+        db.session.add_all(self.seeds)
+        db.session.flush()
+        # Count the seat each enrollment takes in its course.
+        for enrollment in self.seeds:
+            enrollment.course.seats_taken += 1
+        db.session.commit()
@@ -0,0 +1,332 @@
+""" ---------------------------------------------------------------------------
+# IMPORTS
+# --------------------------------------------------------------------------"""
+
+
+# Standard library dependencies
+import csv
+import io
+import random
+from array import array
+
+# Third party dependencies
+from sqlalchemy import func
+
+# Local application dependencies
+from config.config import db, GRADES, SCHEDULE
+from database.models import (Assignment, Course, Enrollment, Instructor,
+                             Student, Waitlist)
+from helpers.helpers import days_to_mask
+
+
+""" ---------------------------------------------------------------------------
+# GENERATED DATA SETTINGS
+# --------------------------------------------------------------------------"""
+
+
+# Rows are loaded in chunks of this many, with COPY on Postgres and with
+# executemany elsewhere.
+CHUNK_SIZE = 10000
+
+# Course meeting patterns, as days and the slot length in minutes. The
+# patterns share no days, and a pattern's slots are its length plus the
+# break apart, so courses in different slots never conflict.
+PATTERNS = [
+    ('Monday,Wednesday,Friday', 60),
+    ('Tuesday,Thursday', 90)
+]
+BREAK = 15
+# Course lengths are the slot length less one of these, in minutes.
+SHORTER_BY = [0, 10]
+CAPACITIES = [15, 20, 25, 30, 40, 60, 100]
+
+FIRST_NAMES = [
+    'Ada', 'Alan', 'Barbara', 'Claude', 'Dennis', 'Edsger', 'Frances',
+    'Grace', 'Hedy', 'Ivan', 'Jean', 'Ken', 'Linus', 'Margaret', 'Niklaus',
+    'Olga', 'Radia', 'Shafi', 'Tim', 'Vint'
+]
+LAST_NAMES = [
+    'Allen', 'Bartik', 'Cerf', 'Dijkstra', 'Engelbart', 'Floyd', 'Goldberg',
+    'Hamilton', 'Hopper', 'Johnson', 'Knuth', 'Lamarr', 'Liskov',
+    'Lovelace', 'Perlman', 'Ritchie', 'Shannon', 'Sutherland', 'Turing',
+    'Wirth'
+]
+SUBJECTS = [
+    'Anthropology', 'Art History', 'Astronomy', 'Biology', 'Chemistry',
+    'Computer Science', 'Economics', 'Geology', 'History', 'Linguistics',
+    'Literature', 'Mathematics', 'Music', 'Philosophy', 'Physics',
+    'Political Science', 'Psychology', 'Sociology', 'Statistics',
+    'Underwater Basket Weaving'
+]
+LEVELS = [101, 102, 201, 202, 301, 310, 401, 450]
+
+
+""" ---------------------------------------------------------------------------
+# GENERATED DATA CLASS
+# --------------------------------------------------------------------------"""
+
+
+# Class initializes with the scale of generated data, and methods to load
+# it into the database. Records are added after the uids already stored,
+# and schedules are conflict-free: an instructor teaches and a student
+# takes at most one course in each slot. Students take one to enrollments
+# courses, the last unenrolled students take none, and students past a
+# course's capacity are waitlisted instead. The same seed generates the
+# same records.
+# -----------------------------------------------------------------------------
+class GeneratedData:
+    def __init__(self, students=1000, instructors=50, courses=100,
+                 enrollments=4, unenrolled=0, seed=0):
+        self.students = students
+        self.instructors = instructors
+        self.courses = courses
+        self.unenrolled = min(unenrolled, students)
+        self.slots = self.schedule_slots()
+        self.enrollments = min(enrollments, len(self.slots))
+        self.seed = seed
+        # An instructor teaches at most one course in each slot.
+        if courses and instructors * len(self.slots) < courses:
+            raise ValueError(f'{courses} courses need at least '
+                             f'{-(-courses // len(self.slots))} instructors')
+
+    # Returns the schedule slots, as (days, start time, end time) in
+    # database format, within SCHEDULE's hours and lengths.
+    @staticmethod
+    def schedule_slots():
+        slots = []
+        for days, length in PATTERNS:
+            length = min(max(length, SCHEDULE.MIN_LENGTH), SCHEDULE.MAX_LENGTH)
+            start = SCHEDULE.MIN_START
+            while start + length <= SCHEDULE.MAX_END:
+                slots.append((days_to_mask(days), start, start + length))
+                start += length + BREAK
+        return slots
+
+    # Returns the random numbers for a kind of record. Each kind has its
+    # own sequence, so changing one kind's scale doesn't change another's.
+    def random_numbers(self, kind):
+        return random.Random(f'{self.seed}:{kind}')
+
+    # Inserts generated records into database with one commit.
+    def create_records(self):
+        self.first_uids = {model: last_issued_uid(model) + 1
+                           for model in (Student, Instructor, Course)}
+        courses = self.course_plan(self.random_numbers('courses'))
+        enrolled, waitlisted = self.enrollment_plan(
+            self.random_numbers('enrollments'), courses
+        )
+        load_rows(Student, self.student_rows(self.random_numbers('students')))
+        load_rows(Instructor, self.instructor_rows(
+            self.random_numbers('instructors')
+        ))
+        load_rows(Course, self.course_rows(self.random_numbers('titles'),
+                                           courses))
+        load_rows(Assignment, (
+            {'course_uid': course['uid'],
+             'instructor_uid': course['instructor_uid']}
+            for course in courses
+        ))
+        load_rows(Enrollment, pair_rows(*enrolled))
+        load_rows(Waitlist, pair_rows(*waitlisted))
+        db.session.commit()
+        reset_sequences()
+
+    # Returns the courses' uids, slots, instructors and capacities. Each
+    # instructor's courses are dealt consecutive slots from a different
+    # first slot, so courses spread over the slots.
+    def course_plan(self, random_numbers):
+        per_instructor = -(-self.courses // max(self.instructors, 1))
+        first_instructor = self.first_uids[Instructor]
+        courses = []
+        for number in range(self.courses):
+            instructor, nth = divmod(number, per_instructor)
+            courses.append({
+                'uid': self.first_uids[Course] + number,
+                'slot': (instructor + nth) % len(self.slots),
+                'instructor_uid': first_instructor + instructor,
+                'capacity': random_numbers.choice(CAPACITIES),
+                'seats_taken': 0
+            })
+        return courses
+
+    # Returns the enrollments and waitlist entries, as student and course
+    # uid arrays. Each student takes courses of different slots, chosen
+    # among the slot's courses with open seats, or is waitlisted when the
+    # slot's courses are all full.
+    def enrollment_plan(self, random_numbers, courses):
+        open_courses = [[] for _ in self.slots]
+        slot_courses = [[] for _ in self.slots]
+        for course in courses:
+            open_courses[course['slot']].append(course)
+            slot_courses[course['slot']].append(course)
+        slots = [slot for slot in range(len(self.slots))
+                 if slot_courses[slot]]
+        enrolled = (array('l'), array('l'))
+        waitlisted = (array('l'), array('l'))
+        for number in range(self.students - self.unenrolled):
+            student_uid = self.first_uids[Student] + number
+            taking = random_numbers.randint(min(self.enrollments, 1),
+                                            self.enrollments)
+            for slot in random_numbers.sample(slots,
+                                              min(taking, len(slots))):
+                if not open_courses[slot]:
+                    course = random_numbers.choice(slot_courses[slot])
+                    waitlisted[0].append(student_uid)
+                    waitlisted[1].append(course['uid'])
+                    continue
+                index = random_numbers.randrange(len(open_courses[slot]))
+                course = open_courses[slot][index]
+                course['seats_taken'] += 1
+                enrolled[0].append(student_uid)
+                enrolled[1].append(course['uid'])
+                # Remove the course once it's full, swapping in the last.
+                if course['seats_taken'] == course['capacity']:
+                    open_courses[slot][index] = open_courses[slot][-1]
+                    open_courses[slot].pop()
+        return enrolled, waitlisted
+
+    # Returns a random name, as first and last.
+    @staticmethod
+    def random_name(random_numbers):
+        return (random_numbers.choice(FIRST_NAMES),
+                random_numbers.choice(LAST_NAMES))
+
+    # Returns a random phone number in a valid format.
+    @staticmethod
+    def random_phone(random_numbers):
+        return (f'{random_numbers.randint(200, 999)}-'
+                f'{random_numbers.randint(200, 999)}-'
+                f'{random_numbers.randint(0, 9999):04d}')
+
+    # Returns the student rows. Emails are unique by uid.
+    def student_rows(self, random_numbers):
+        for number in range(self.students):
+            uid = self.first_uids[Student] + number
+            first, last = self.random_name(random_numbers)
+            yield {
+                'uid': uid,
+                'name': f'{first} {last}',
+                'email': f'{first}.{last}.{uid}@students.example.edu'.lower(),
+                'phone': self.random_phone(random_numbers)
+            }
+
+    # Returns the instructor rows. Emails are unique by uid.
+    def instructor_rows(self, random_numbers):
+        for number in range(self.instructors):
+            uid = self.first_uids[Instructor] + number
+            first, last = self.random_name(random_numbers)
+            yield {
+                'uid': uid,
+                'name': f'{first} {last}',
+                'email': f'{first}.{last}.{uid}@faculty.example.edu'.lower(),
+                'phone': self.random_phone(random_numbers),
+                'bio': (f'{first} {last} teaches '
+                        f'{random_numbers.choice(SUBJECTS)}.')
+            }
+
+    # Returns the course rows, with their planned slots and seats.
+    def course_rows(self, random_numbers, courses):
+        for course in courses:
+            days, start_time, end_time = self.slots[course['slot']]
+            subject = random_numbers.choice(SUBJECTS)
+            level = random_numbers.choice(LEVELS)
+            end_time -= random_numbers.choice(SHORTER_BY)
+            yield {
+                'uid': course['uid'],
+                'title': f'{subject} {level} (Section {course["uid"]})',
+                'days': days,
+                'start_time': start_time,
+                'end_time': max(end_time, start_time + SCHEDULE.MIN_LENGTH),
+                'description': f'A level {level} course in {subject}.',
+                'capacity': course['capacity'],
+                'seats_taken': course['seats_taken'],
+                'credits': GRADES.DEFAULT_CREDITS,
+                'version': 1
+            }
+
+
+""" ---------------------------------------------------------------------------
+# LOADING HELPERS
+# --------------------------------------------------------------------------"""
+
+
+# Returns enrollment or waitlist rows from student and course uid arrays.
+def pair_rows(student_uids, course_uids):
+    return ({'student_uid': student_uid, 'course_uid': course_uid}
+            for student_uid, course_uid in zip(student_uids, course_uids))
+
+
+# Loads the rows into the model's table a chunk at a time, in the session's
+# transaction.
+def load_rows(model, rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            load_chunk(model.__table__, chunk)
+            chunk = []
+    if chunk:
+        load_chunk(model.__table__, chunk)
+
+
+# Loads a chunk of rows with COPY on Postgres, which skips parsing a
+# statement per row, and with executemany elsewhere.
+def load_chunk(table, chunk):
+    if db.session.get_bind().dialect.name != 'postgresql':
+        db.session.execute(table.insert(), chunk)
+        return
+    columns = list(chunk[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in chunk:
+        # Empty unquoted CSV fields are loaded as NULL.
+        writer.writerow(['' if row[column] is None else row[column]
+                         for column in columns])
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(
+        f'COPY {table.name} ({", ".join(columns)}) FROM STDIN '
+        f'WITH (FORMAT csv)', buffer
+    )
+
+
+# Returns the model's last issued uid, from its sequence as well as its
+# rows, so uids of deleted records are never reused. On SQLite only
+# autoincrement tables keep a sequence, in sqlite_sequence.
+def last_issued_uid(model):
+    table = model.__tablename__
+    dialect = db.session.get_bind().dialect.name
+    issued = db.session.query(func.max(model.uid)).scalar() or 0
+    if dialect == 'postgresql':
+        sequence = db.session.execute(
+            f"SELECT pg_get_serial_sequence('{table}', 'uid')"
+        ).scalar()
+        last_value, is_called = db.session.execute(
+            f'SELECT last_value, is_called FROM {sequence}'
+        ).first()
+        issued = max(issued, last_value if is_called else last_value - 1)
+    elif (dialect == 'sqlite' and
+            model.__table__.kwargs.get('sqlite_autoincrement')):
+        issued = max(issued, db.session.execute(
+            'SELECT seq FROM sqlite_sequence WHERE name = :table',
+            {'table': table}
+        ).scalar() or 0)
+    return issued
+
+
+# Moves Postgres sequences past the loaded uids, which were set explicitly.
+# Sequences are never moved back. SQLite moves its own sequences past
+# explicit uids.
+def reset_sequences():
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    for model in (Student, Instructor, Course, Assignment, Enrollment,
+                  Waitlist):
+        issued = last_issued_uid(model)
+        if issued:
+            table = model.__tablename__
+            db.session.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'uid'), "
+                f"{issued})"
+            )
+    db.session.commit()
@@ -0,0 +1,116 @@
+""" ---------------------------------------------------------------------------
+# IMPORTS
+# --------------------------------------------------------------------------"""
+
+
+# Standard library dependencies
+from types import SimpleNamespace
+
+# Local application dependencies
+from config.config import db
+from controllers.controllers import Grades
+from database.models import Grade
+
+
+""" ---------------------------------------------------------------------------
+# TEST DATA CLASS
+# --------------------------------------------------------------------------"""
+
+
+# Class initializes with test data, and methods to populate test database.
+# -----------------------------------------------------------------------------
+class GradeTest:
+    def __init__(self):
+        # Seed data for test database
+        self.seeds = [
+            Grade(
+                course_uid=1,
+                student_uid=1,
+                grade='A'
+            ),
+            Grade(
+                course_uid=1,
+                student_uid=2,
+                grade='B+'
+            ),
+            Grade(
+                course_uid=2,
+                student_uid=2,
+                grade='A-'
+            ),
+        ]
+        # Data for test cases.
+        self.data = SimpleNamespace(
+            post_grades={
+                "course_uid": 1,
+                "grades": [
+                    {
+                        "student_uid": 1,
+                        "grade": "a-"
+                    },
+                    {
+                        "student_uid": 2,
+                        "grade": "B+"
+                    }
+                ]
+            },
+            new_grades={
+                "course_uid": 3,
+                "grades": [
+                    {
+                        "student_uid": 3,
+                        "grade": "C"
+                    }
+                ]
+            },
+            bad_grades={
+                "course_uid": 1,
+                "grades": [
+                    {
+                        "student_uid": 1,
+                        "grade": "A"
+                    },
+                    {
+                        "student_uid": 1,
+                        "grade": "B"
+                    },
+                    {
+                        "student_uid": 3,
+                        "grade": "B"
+                    },
+                    {
+                        "student_uid": 2,
+                        "grade": "Z"
+                    },
+                    {
+                        "student_uid": "junk",
+                        "grade": "A"
+                    },
+                    {
+                        "student_uid": 2
+                    }
+                ]
+            },
+            bad_course={
+                "course_uid": 100000,
+                "grades": [
+                    {
+                        "student_uid": 1,
+                        "grade": "A"
+                    }
+                ]
+            },
+            edit_grade={
+                "grade": "C+"
+            },
+            bad_grade={
+                "grade": "E"
+            }
+        )
+
+    # Inserts seed data into database with one commit, and computes the
+    # transcripts.
+    def create_records(self):
+        db.session.add_all(self.seeds)
+        db.session.commit()
+        Grades().recompute_transcripts()
@@ -7,6 +7,7 @@
 from types import SimpleNamespace
 
 # Local application dependencies
+from config.config import db
 from database.models import Student
 
 
@@ -88,7 +89,7 @@ class StudentTest:
             }
         )
 
-    # Inserts seed data into database.
+    # Inserts seed data into database with one commit.
     def create_records(self):
-        for student in self.seeds:
-            student.insert()
+        db.session.add_all(self.seeds)
+        db.session.commit()
@@ -8,12 +8,14 @@ import unittest
 
 # Local application dependencies
 from api import create_app
+from cache.cache import catalog_cache
 from config.config import db, setup_db
 from database.test_data.courses_data import CourseTest
 from database.test_data.students_data import StudentTest
 from database.test_data.instructors_data import InstructorTest
 from database.test_data.assignments_data import AssignmentTest
 from database.test_data.enrollments_data import EnrollmentTest
+from database.test_data.grades_data import GradeTest
 
 
 """ ---------------------------------------------------------------------------
@@ -34,6 +36,8 @@ class CourseEnrollmentsTestCase(unittest.TestCase):
         self.app_context.push()
         self.db.drop_all()
         self.db.create_all()
+        # Clear cached responses from the dropped database.
+        catalog_cache.clear()
         # Add test course records to test database.
         self.courses = CourseTest()
         self.courses.create_records()
@@ -49,6 +53,9 @@ class CourseEnrollmentsTestCase(unittest.TestCase):
         # Add test enrollments records to test database.
         self.enrollments = EnrollmentTest()
         self.enrollments.create_records()
+        # Add test grade records to test database.
+        self.grades = GradeTest()
+        self.grades.create_records()
 
     # Remove session, drop db tables and tear down app context.
     def tearDown(self):
@@ -4,14 +4,33 @@
 
 
 # Standard library dependencies.
+import csv
 import json
 import requests
 
 # Third party dependencies.
-from flask import request
+from flask import Response, request
+
+# Optional third party dependencies. orjson serializes responses faster
+# than the standard library, Flask 2.2 and later take a JSON provider, and
+# Flask 2.3 removed the JSON encoder.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:
+    DefaultJSONProvider = None
+try:
+    from flask.json import JSONEncoder
+except ImportError:
+    JSONEncoder = None
 
 # Local application dependencies.
-from config.config import STATUS_ERR, AUTH0
+from auth.local_issuer import mint_token
+from config.config import (STATUS_ERR, AUTH0, GRADES, IMPORT, LOCAL_AUTH,
+                           SCHEDULE)
 
 
 """ --------------------------------------------------------------------------#
@@ -21,10 +40,12 @@ from config.config import STATUS_ERR, AUTH0
 
 # Raise HTTP status error exceptions
 class StatusError(Exception):
-    def __init__(self, message, description, status_code):
+    def __init__(self, message, description, status_code, errors=None):
         self.message = message
         self.description = description
         self.status_code = status_code
+        # Optional list of errors, such as an error for each invalid item.
+        self.errors = errors
 
 
 """ --------------------------------------------------------------------------#
@@ -49,8 +70,11 @@ def get_detail():
 
 
 # Structure CURL request with auth0 configuration and return response with
-# bearer tokens for test users.
+# bearer tokens for test users. With the local issuer, tokens are minted
+# locally instead.
 def get_user_token(test_user):
+    if LOCAL_AUTH.ENABLED:
+        return mint_token(test_user)
     url = f'https://{AUTH0.DOMAIN}/oauth/token'
     headers = {"content-type": "application/json"}
     request_data = {
@@ -70,3 +94,177 @@ def get_user_token(test_user):
 # Return header with bearer token.
 def get_user_token_headers(test_user):
     return {'authorization': "Bearer " + get_user_token(test_user)}
+
+
+""" --------------------------------------------------------------------------#
+# SCHEDULE HELPERS
+# --------------------------------------------------------------------------"""
+
+
+# Converts a list or comma separated string of day names to a bitmask,
+# where each day's bit is its position in SCHEDULE.WEEK_DAYS. Bitmasks are
+# returned unchanged.
+def days_to_mask(days):
+    if type(days) is int:
+        return days
+    if type(days) is str:
+        days = days.split(',')
+    week_days = [day.casefold() for day in SCHEDULE.WEEK_DAYS]
+    mask = 0
+    for day in days:
+        mask |= 1 << week_days.index(day.strip().casefold())
+    return mask
+
+
+# Converts a bitmask to a list of capitalized day names in week order.
+def mask_to_days(mask):
+    return [day for bit, day in enumerate(SCHEDULE.WEEK_DAYS)
+            if mask & (1 << bit)]
+
+
+# Converts a 24-hour time string in the format HH:MM to an integer value
+# expressed as minutes. Integers are returned unchanged.
+def time_to_minutes(time_string):
+    if type(time_string) is int:
+        return time_string
+    hours, minutes = time_string.split(':')
+    return (int(hours) * 60) + int(minutes)
+
+
+# Converts an integer value expressed as minutes to a 24-hour time string
+# in the format HH:MM.
+def minutes_to_time(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+# Checks whether two schedules share a day and overlap in time. Schedules
+# are any objects with days, start_time and end_time in database format.
+def schedules_overlap(first, second):
+    return bool(first.days & second.days and
+                first.start_time < second.end_time and
+                first.end_time > second.start_time)
+
+
+""" --------------------------------------------------------------------------#
+# GRADE HELPERS
+# --------------------------------------------------------------------------"""
+
+
+# Converts a grade to credit-weighted grade points in tenths, so totals of
+# grade points are exact integers.
+def quality_points(grade, credits):
+    return round(GRADES.POINTS[grade] * 10) * credits
+
+
+""" --------------------------------------------------------------------------#
+# IMPORT HELPERS
+# --------------------------------------------------------------------------"""
+
+
+# Gets the format of an import from the 'format' argument, or from the
+# request content type. Errors if the format isn't supported.
+def get_import_format():
+    file_format = (request.args.get('format') or
+                   IMPORT.CONTENT_TYPES.get(request.mimetype))
+    if file_format not in IMPORT.FORMATS:
+        raise StatusError(STATUS_ERR.CODE_422, STATUS_ERR.BAD_FORMAT, 422)
+    return file_format
+
+
+# Reads records from CSV or NDJSON lines one line at a time, so imports
+# of any size can be streamed. Yields each record's row number with the
+# record, or with a description of why it couldn't be read.
+def read_import_records(lines, file_format):
+    if file_format == 'csv':
+        return read_csv_records(lines)
+    return read_ndjson_records(lines)
+
+
+# Reads CSV records keyed by the header row. Row numbers count records
+# after the header.
+def read_csv_records(lines):
+    reader = csv.DictReader(lines)
+    number = 0
+    while True:
+        number += 1
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error:
+            yield number, None, STATUS_ERR.BAD_ROW
+            continue
+        # Rows with more fields than the header have a None key, and rows
+        # with fewer have None values.
+        if None in row.keys():
+            yield number, None, STATUS_ERR.BAD_ROW
+        else:
+            yield number, {key.strip(): value for key, value in row.items()
+                           if value is not None}, None
+
+
+# Reads NDJSON records, one JSON object per line. Row numbers are line
+# numbers, and blank lines are skipped.
+def read_ndjson_records(lines):
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, None, STATUS_ERR.BAD_ROW
+            continue
+        if type(record) is dict:
+            yield number, record, None
+        else:
+            yield number, None, STATUS_ERR.BAD_ROW
+
+
+""" --------------------------------------------------------------------------#
+# JSON HELPERS
+# --------------------------------------------------------------------------"""
+
+
+# Flask's encoder for types JSON can't encode, like dates. Flask 2.2 and
+# later keep it on the JSON provider.
+if DefaultJSONProvider:
+    flask_json_default = DefaultJSONProvider.default
+else:
+    flask_json_default = JSONEncoder().default
+
+
+# Serializes data to compact JSON bytes with sorted keys, as jsonify does
+# outside debug mode. Uses orjson when it is installed, which is several
+# times faster on large lists, and the standard library when it isn't.
+def json_dumps(data):
+    if orjson:
+        return orjson.dumps(
+            data, default=flask_json_default,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(data, default=flask_json_default, sort_keys=True,
+                      separators=(',', ':')).encode()
+
+
+# Returns a JSON response of the data, serialized with json_dumps.
+def json_response(data, status=200):
+    return Response(json_dumps(data), status=status,
+                    mimetype='application/json')
+
+
+# JSON provider that serializes with json_dumps, so jsonify uses it too
+# on Flask 2.2 and later. Earlier versions serialize controller responses
+# with json_response directly. Dumps with options, like indent, are left
+# to Flask's provider, which passes them to the standard library.
+if DefaultJSONProvider:
+    class FastJSONProvider(DefaultJSONProvider):
+        def dumps(self, obj, **kwargs):
+            if kwargs:
+                return super().dumps(obj, **kwargs)
+            return json_dumps(obj).decode()
+
+        def response(self, *args, **kwargs):
+            data = self._prepare_response_obj(args, kwargs)
+            return json_response(data)
+else:
+    FastJSONProvider = None
@@ -1,8 +1,14 @@
+import json
+import os
+
 from flask_script import Manager
 from flask_migrate import Migrate, MigrateCommand
 
 from api import create_app
+from config.config import IMPORT, STATUS_ERR
+from controllers.controllers import Students, Instructors, Grades
 from database.models import db
+from database.test_data.generated_data import GeneratedData
 
 app = create_app()
 
@@ -12,5 +18,53 @@ manager = Manager(app)
 manager.add_command('db', MigrateCommand)
 
 
+# Imports students or instructors from a CSV or NDJSON file, streaming the
+# file a chunk of records at a time. The format defaults to the file
+# extension.
+@manager.option('-f', '--format', dest='file_format', default=None,
+                choices=['csv', 'ndjson'], help='csv or ndjson')
+@manager.option('path', help='file to import')
+@manager.option('entity', choices=['students', 'instructors'],
+                help='students or instructors')
+def import_records(entity, path, file_format=None):
+    if not file_format:
+        file_format = os.path.splitext(path)[1].lstrip('.').lower()
+    if file_format not in IMPORT.FORMATS:
+        raise SystemExit(STATUS_ERR.BAD_FORMAT)
+    controller = Students() if entity == 'students' else Instructors()
+    with open(path, encoding='utf-8', errors='replace', newline='') as lines:
+        controller.import_records(lines, file_format)
+    print(json.dumps(controller.response_data.__dict__, indent=2))
+
+
+# Recomputes every student's transcript totals from their grades, for
+# backfills or to repair totals after grades are changed outside the API.
+@manager.command
+def recompute_transcripts():
+    students = Grades().recompute_transcripts()
+    print(f'Recomputed transcripts for {students} students.')
+
+
+# Generates synthetic students, instructors and courses with conflict-free
+# schedules and enrollments, and bulk loads them after the stored records,
+# for capacity planning and benchmarks.
+@manager.option('--seed', type=int, default=0, help='random seed')
+@manager.option('--enrollments', type=int, default=4,
+                help='most courses a student takes')
+@manager.option('--courses', type=int, default=100)
+@manager.option('--instructors', type=int, default=50)
+@manager.option('--students', type=int, default=1000)
+def generate_data(students, instructors, courses, enrollments, seed):
+    try:
+        generated = GeneratedData(students=students, instructors=instructors,
+                                  courses=courses, enrollments=enrollments,
+                                  seed=seed)
+    except ValueError as error:
+        raise SystemExit(error)
+    generated.create_records()
+    print(f'Generated {students} students, {instructors} instructors and '
+          f'{courses} courses.')
+
+
 if __name__ == '__main__':
     manager.run()
@@ -0,0 +1,25 @@
+"""Add course version for catalog ETags
+
+Revision ID: 2a7d4c9e1b56
+Revises: 9e3c5a1b7f28
+Create Date: 2026-10-17 16:20:03.118542
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a7d4c9e1b56'
+down_revision = '9e3c5a1b7f28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('course', sa.Column('version', sa.Integer(),
+                                      server_default='1', nullable=False))
+
+
+def downgrade():
+    op.drop_column('course', 'version')
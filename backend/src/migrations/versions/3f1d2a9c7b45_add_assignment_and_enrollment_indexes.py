@@ -0,0 +1,62 @@
+"""Add assignment and enrollment indexes and unique constraints
+
+Revision ID: 3f1d2a9c7b45
+Revises: 6c658d6ad87e
+Create Date: 2026-10-17 09:12:44.318205
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1d2a9c7b45'
+down_revision = '6c658d6ad87e'
+branch_labels = None
+depends_on = None
+
+
+# Raises an error listing rows that repeat the columns, which a unique
+# constraint on them would reject. Duplicates are left for an operator
+# to resolve, as deleting them would lose data downgrade can't restore.
+def check_duplicates(table, columns):
+    keys = ', '.join(columns)
+    duplicates = op.get_bind().execute(
+        f'SELECT {keys}, COUNT(*) FROM {table} GROUP BY {keys} '
+        f'HAVING COUNT(*) > 1 ORDER BY {keys}'
+    ).fetchall()
+    if duplicates:
+        rows = '\n'.join(
+            ', '.join(f'{column}={value}' for column, value in
+                      zip(columns, row[:-1])) + f' ({row[-1]} rows)'
+            for row in duplicates
+        )
+        raise RuntimeError(
+            f'{table} has rows with the same {keys}, remove them and run '
+            f'the upgrade again:\n{rows}'
+        )
+
+
+def upgrade():
+    # Stop before any change if rows would break the unique constraints.
+    check_duplicates('assignment', ['course_uid', 'instructor_uid'])
+    check_duplicates('enrollment', ['course_uid', 'student_uid'])
+    # The unique constraints' indexes lead with course_uid, so they also
+    # serve lookups by course.
+    op.create_unique_constraint('uq_assignment_course_uid_instructor_uid',
+                                'assignment', ['course_uid', 'instructor_uid'])
+    op.create_index(op.f('ix_assignment_instructor_uid'), 'assignment',
+                    ['instructor_uid'], unique=False)
+    op.create_unique_constraint('uq_enrollment_course_uid_student_uid',
+                                'enrollment', ['course_uid', 'student_uid'])
+    op.create_index(op.f('ix_enrollment_student_uid'), 'enrollment',
+                    ['student_uid'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_enrollment_student_uid'), table_name='enrollment')
+    op.drop_constraint('uq_enrollment_course_uid_student_uid', 'enrollment',
+                       type_='unique')
+    op.drop_index(op.f('ix_assignment_instructor_uid'),
+                  table_name='assignment')
+    op.drop_constraint('uq_assignment_course_uid_instructor_uid',
+                       'assignment', type_='unique')
@@ -0,0 +1,53 @@
+"""Add grade index and unique constraint
+
+Revision ID: 5d2b8e71a6f3
+Revises: c4a7e2f19d30
+Create Date: 2026-10-17 13:40:27.915402
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2b8e71a6f3'
+down_revision = 'c4a7e2f19d30'
+branch_labels = None
+depends_on = None
+
+
+# Raises an error listing rows that repeat the columns, which a unique
+# constraint on them would reject. Duplicates are left for an operator
+# to resolve, as deleting them would lose data downgrade can't restore.
+def check_duplicates(table, columns):
+    keys = ', '.join(columns)
+    duplicates = op.get_bind().execute(
+        f'SELECT {keys}, COUNT(*) FROM {table} GROUP BY {keys} '
+        f'HAVING COUNT(*) > 1 ORDER BY {keys}'
+    ).fetchall()
+    if duplicates:
+        rows = '\n'.join(
+            ', '.join(f'{column}={value}' for column, value in
+                      zip(columns, row[:-1])) + f' ({row[-1]} rows)'
+            for row in duplicates
+        )
+        raise RuntimeError(
+            f'{table} has rows with the same {keys}, remove them and run '
+            f'the upgrade again:\n{rows}'
+        )
+
+
+def upgrade():
+    # Stop before any change if rows would break the unique constraint.
+    check_duplicates('grade', ['course_uid', 'student_uid'])
+    # The unique constraint's index leads with course_uid, so it also
+    # serves lookups by course.
+    op.create_unique_constraint('uq_grade_course_uid_student_uid', 'grade',
+                                ['course_uid', 'student_uid'])
+    op.create_index(op.f('ix_grade_student_uid'), 'grade', ['student_uid'],
+                    unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_grade_student_uid'), table_name='grade')
+    op.drop_constraint('uq_grade_course_uid_student_uid', 'grade',
+                       type_='unique')
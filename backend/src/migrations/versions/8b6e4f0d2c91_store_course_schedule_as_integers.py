@@ -0,0 +1,79 @@
+"""Store course days as a bitmask and times as minutes
+
+Revision ID: 8b6e4f0d2c91
+Revises: 3f1d2a9c7b45
+Create Date: 2026-10-17 11:40:03.527114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b6e4f0d2c91'
+down_revision = '3f1d2a9c7b45'
+branch_labels = None
+depends_on = None
+
+
+# Each day's bit is its position in this list, matching
+# SCHEDULE.WEEK_DAYS when this migration was written.
+WEEK_DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
+             'Saturday', 'Sunday']
+
+
+def upgrade():
+    op.add_column('course', sa.Column('days_mask', sa.Integer()))
+    op.add_column('course', sa.Column('start_minutes', sa.Integer()))
+    op.add_column('course', sa.Column('end_minutes', sa.Integer()))
+    # Convert comma separated day names to a bitmask, and HH:MM times to
+    # minutes after midnight.
+    days_mask = ' + '.join(
+        f"(CASE WHEN lower(days) LIKE '%{day.lower()}%' THEN {1 << bit} "
+        f"ELSE 0 END)"
+        for bit, day in enumerate(WEEK_DAYS)
+    )
+    op.execute(
+        f'UPDATE course SET days_mask = {days_mask}, '
+        "start_minutes = split_part(start_time, ':', 1)::integer * 60 "
+        "+ split_part(start_time, ':', 2)::integer, "
+        "end_minutes = split_part(end_time, ':', 1)::integer * 60 "
+        "+ split_part(end_time, ':', 2)::integer"
+    )
+    op.drop_column('course', 'days')
+    op.drop_column('course', 'start_time')
+    op.drop_column('course', 'end_time')
+    op.alter_column('course', 'days_mask', new_column_name='days',
+                    nullable=False)
+    op.alter_column('course', 'start_minutes', new_column_name='start_time',
+                    nullable=False)
+    op.alter_column('course', 'end_minutes', new_column_name='end_time',
+                    nullable=False)
+
+
+def downgrade():
+    op.add_column('course', sa.Column('days_names', sa.String(length=240)))
+    op.add_column('course', sa.Column('start_string',
+                                      sa.String(length=120)))
+    op.add_column('course', sa.Column('end_string', sa.String(length=120)))
+    # Convert bitmasks to comma separated day names, and minutes to HH:MM.
+    days_names = ', '.join(
+        f"(CASE WHEN days & {1 << bit} <> 0 THEN '{day}' END)"
+        for bit, day in enumerate(WEEK_DAYS)
+    )
+    op.execute(
+        f"UPDATE course SET days_names = concat_ws(',', {days_names}), "
+        "start_string = lpad((start_time / 60)::text, 2, '0') || ':' "
+        "|| lpad((start_time % 60)::text, 2, '0'), "
+        "end_string = lpad((end_time / 60)::text, 2, '0') || ':' "
+        "|| lpad((end_time % 60)::text, 2, '0')"
+    )
+    op.drop_column('course', 'days')
+    op.drop_column('course', 'start_time')
+    op.drop_column('course', 'end_time')
+    op.alter_column('course', 'days_names', new_column_name='days',
+                    nullable=False)
+    op.alter_column('course', 'start_string', new_column_name='start_time',
+                    nullable=False)
+    op.alter_column('course', 'end_string', new_column_name='end_time',
+                    nullable=False)
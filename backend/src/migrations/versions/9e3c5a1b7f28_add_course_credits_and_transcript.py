@@ -0,0 +1,50 @@
+"""Add course credits and student transcript totals
+
+Revision ID: 9e3c5a1b7f28
+Revises: 5d2b8e71a6f3
+Create Date: 2026-10-17 15:12:48.305917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e3c5a1b7f28'
+down_revision = '5d2b8e71a6f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('course', sa.Column('credits', sa.Integer(),
+                                      server_default='3', nullable=False))
+    op.create_table(
+        'transcript',
+        sa.Column('student_uid', sa.Integer(), autoincrement=False,
+                  nullable=False),
+        sa.Column('credits', sa.Integer(), nullable=False),
+        sa.Column('points', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['student_uid'], ['student.uid'], ),
+        sa.PrimaryKeyConstraint('student_uid')
+    )
+    # Total existing grades, with grade points in tenths so sums stay
+    # exact. The points are copied here so the migration doesn't change
+    # if the grade scale in config does.
+    op.execute(
+        'INSERT INTO transcript (student_uid, credits, points) '
+        'SELECT grade.student_uid, SUM(course.credits), '
+        'SUM(course.credits * CASE grade.grade '
+        "WHEN 'A' THEN 40 WHEN 'A-' THEN 37 "
+        "WHEN 'B+' THEN 33 WHEN 'B' THEN 30 WHEN 'B-' THEN 27 "
+        "WHEN 'C+' THEN 23 WHEN 'C' THEN 20 WHEN 'C-' THEN 17 "
+        "WHEN 'D+' THEN 13 WHEN 'D' THEN 10 WHEN 'D-' THEN 7 "
+        'ELSE 0 END) '
+        'FROM grade JOIN course ON grade.course_uid = course.uid '
+        'GROUP BY grade.student_uid'
+    )
+
+
+def downgrade():
+    op.drop_table('transcript')
+    op.drop_column('course', 'credits')
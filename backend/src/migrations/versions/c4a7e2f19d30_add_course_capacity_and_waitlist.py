@@ -0,0 +1,48 @@
+"""Add course capacity, seat counter and waitlist
+
+Revision ID: c4a7e2f19d30
+Revises: 8b6e4f0d2c91
+Create Date: 2026-10-17 11:02:15.604811
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e2f19d30'
+down_revision = '8b6e4f0d2c91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('course', sa.Column('capacity', sa.Integer(),
+                                      nullable=True))
+    op.add_column('course', sa.Column('seats_taken', sa.Integer(),
+                                      server_default='0', nullable=False))
+    # Count the seats taken by existing enrollments.
+    op.execute(
+        'UPDATE course SET seats_taken = (SELECT COUNT(*) FROM enrollment '
+        'WHERE enrollment.course_uid = course.uid)'
+    )
+    op.create_table(
+        'waitlist',
+        sa.Column('uid', sa.Integer(), nullable=False),
+        sa.Column('course_uid', sa.Integer(), nullable=False),
+        sa.Column('student_uid', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['course_uid'], ['course.uid'], ),
+        sa.ForeignKeyConstraint(['student_uid'], ['student.uid'], ),
+        sa.PrimaryKeyConstraint('uid'),
+        sa.UniqueConstraint('course_uid', 'student_uid',
+                            name='uq_waitlist_course_uid_student_uid')
+    )
+    op.create_index(op.f('ix_waitlist_student_uid'), 'waitlist',
+                    ['student_uid'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_waitlist_student_uid'), table_name='waitlist')
+    op.drop_table('waitlist')
+    op.drop_column('course', 'seats_taken')
+    op.drop_column('course', 'capacity')
@@ -0,0 +1,88 @@
+""" --------------------------------------------------------------------------#
+# IMPORTS
+# --------------------------------------------------------------------------"""
+
+
+# Standard library dependencies
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+""" --------------------------------------------------------------------------#
+# PARALLEL TEST RUNNER
+# --------------------------------------------------------------------------"""
+
+
+# Runs the unittests across worker processes. Each worker gets its own test
+# database (see worker_db_path), so workers don't share rows or locks. Run
+# from src with: python run_tests.py --workers 4
+
+
+# Returns the ids of the tests in the module, grouped by test case class.
+def test_ids(module):
+    classes = {}
+    suites = [unittest.defaultTestLoader.loadTestsFromName(module)]
+    while suites:
+        for test in suites.pop():
+            if isinstance(test, unittest.TestSuite):
+                suites.append(test)
+            else:
+                classes.setdefault(type(test), []).append(test.id())
+    return classes
+
+
+# Splits the tests between workers. Each class's tests are dealt round robin,
+# starting where the last class left off, so the shares stay even.
+def split_tests(classes, workers):
+    shares = [[] for _ in range(workers)]
+    worker = 0
+    for ids in classes.values():
+        for test_id in sorted(ids):
+            shares[worker].append(test_id)
+            worker = (worker + 1) % workers
+    return [share for share in shares if share]
+
+
+# Starts a unittest process for each share, named by its TEST_WORKER_ID.
+# Output goes to a temporary file, so a worker never blocks on a full pipe.
+def start_workers(shares, verbose=False):
+    command = [sys.executable, '-m', 'unittest'] + (['-v'] if verbose else [])
+    workers = []
+    for worker_id, share in enumerate(shares):
+        env = dict(os.environ, TEST_WORKER_ID=str(worker_id))
+        output = tempfile.TemporaryFile(mode='w+')
+        process = subprocess.Popen(command + share, env=env, stdout=output,
+                                   stderr=subprocess.STDOUT)
+        workers.append((process, output))
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run the unittests across worker processes.'
+    )
+    parser.add_argument('-w', '--workers', type=int,
+                        default=os.cpu_count() or 1)
+    parser.add_argument('-m', '--module', default='test_api')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args()
+
+    shares = split_tests(test_ids(args.module), max(args.workers, 1))
+    workers = start_workers(shares, args.verbose)
+    failed = 0
+    for worker_id, (process, output) in enumerate(workers):
+        failed += process.wait() != 0
+        output.seek(0)
+        print(f'--- worker {worker_id} ---')
+        print(output.read(), end='')
+        output.close()
+    print(f'{len(workers)} workers, {failed} failed.')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())